@@ -1,11 +1,37 @@
 import os
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from api.routes import scan, pr, report
+from engine._json import dumps_bytes
+from engine.db import close_all
+
+
+THREAD_POOL_SIZE = int(os.environ.get("THREAD_POOL_SIZE", "64"))
+
+
+class OrjsonResponse(JSONResponse):
+    # fastapi.responses.ORJSONResponse는 deprecated → orjson 직접 호출
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 동시 스캔(webhook) 처리량을 위해 스레드풀 상한 확대
+    to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    yield
+    close_all()
+
 
 app = FastAPI(
     title="GhostCode Auditor",
     version="0.1.0",
     description="Shadow logic detection for TS/React codebases",
+    default_response_class=OrjsonResponse,
+    lifespan=lifespan,
 )
 
 app.include_router(scan.router, prefix="/scan", tags=["scan"])
@@ -1,8 +1,8 @@
-import asyncio
 import logging
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from engine.pipeline import run_pr_scan, post_pr_comment
@@ -16,6 +16,7 @@ class PRScanRequest(BaseModel):
     repo_name: str  # owner/repo
     pr_number: int
     head_sha: str
+    base_ref: str = ""  # PR base branch (비어 있으면 gh로 조회)
 
 
 @router.post("/")
@@ -24,16 +25,16 @@ async def pr_scan(req: PRScanRequest):
     if not Path(req.repo_path).is_dir():
         raise HTTPException(400, f"Not a directory: {req.repo_path}")
 
-    report = await asyncio.to_thread(
+    report = await run_in_threadpool(
         run_pr_scan, req.repo_path, req.repo_name,
-        req.pr_number, req.head_sha,
+        req.pr_number, req.head_sha, req.base_ref,
     )
 
     if report.get("summary", {}).get("scanned_units", 0) == 0:
         return {"status": "no_units", "scan_id": report.get("scan_id")}
 
     # Post comment (fire-and-forget style, log errors)
-    posted = await asyncio.to_thread(
+    posted = await run_in_threadpool(
         post_pr_comment, req.repo_name, req.pr_number, report,
     )
     if not posted:
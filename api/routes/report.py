@@ -1,26 +1,23 @@
-import json
-
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
+from engine._json import unpack_raw
 from engine.db import get_conn, init_db
 
 router = APIRouter()
 
 
 @router.get("/{scan_id}")
-async def get_report(scan_id: str):
+def get_report(scan_id: str):
     """리포트 조회."""
     init_db()
-    conn = get_conn()
-    try:
-        row = conn.execute(
-            "SELECT report_json FROM scans WHERE scan_id = ?",
-            (scan_id,),
-        ).fetchone()
-    finally:
-        conn.close()
+    row = get_conn().execute(
+        "SELECT report_json FROM scans WHERE scan_id = ?",
+        (scan_id,),
+    ).fetchone()
 
     if not row or not row["report_json"]:
         raise HTTPException(404, f"Report not found: {scan_id}")
 
-    return json.loads(row["report_json"])
+    # 저장된 JSON을 압축만 풀어 반환 (parse + re-encode 생략)
+    return Response(content=unpack_raw(row["report_json"]),
+                    media_type="application/json")
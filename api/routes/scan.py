@@ -1,7 +1,7 @@
-import asyncio
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from engine.pipeline import run_full_scan
@@ -20,7 +20,7 @@ async def start_scan(req: ScanRequest):
     if not Path(req.repo_path).is_dir():
         raise HTTPException(400, f"Not a directory: {req.repo_path}")
 
-    report = await asyncio.to_thread(
+    report = await run_in_threadpool(
         run_full_scan, req.repo_path, req.repo_name
     )
     return report
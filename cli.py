@@ -2,13 +2,13 @@
 """GhostCode Auditor CLI — quality-gate 연동용."""
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
 # engine 모듈 import를 위해 프로젝트 루트를 path에 추가
 sys.path.insert(0, str(Path(__file__).parent))
 
+from engine._json import dumps
 from engine.pipeline import run_full_scan
 
 
@@ -22,13 +22,13 @@ def main():
 
     repo_path = str(Path(args.repo_path).resolve())
     if not Path(repo_path).is_dir():
-        print(json.dumps({"status": "error", "message": f"경로 없음: {repo_path}"}))
+        print(dumps({"status": "error", "message": f"경로 없음: {repo_path}"}))
         sys.exit(1)
 
     report = run_full_scan(repo_path, args.repo_name)
 
     if args.format == "json":
-        print(json.dumps(report, default=str, ensure_ascii=False))
+        print(dumps(report, default=str))
     else:
         summary = report.get("summary", {})
         print(f"Scanned: {summary.get('scanned_units', 0)} units")
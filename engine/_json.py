@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import orjson
+import zstandard
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_DATACLASS
+_ZSTD_LEVEL = 3
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> str:
+    """Serialize to a UTF-8 JSON string (non-ASCII kept as-is)."""
+    return orjson.dumps(obj, default=default, option=_OPTIONS).decode()
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (API responses)."""
+    return orjson.dumps(obj, option=_OPTIONS)
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """Serialize to 2-space indented UTF-8 JSON bytes (report files)."""
+    return orjson.dumps(obj, option=_OPTIONS | orjson.OPT_INDENT_2)
+
+
+def pack(obj: Any) -> bytes:
+    """Serialize to zstd-compressed JSON for SQLite BLOB columns."""
+    return zstandard.compress(orjson.dumps(obj, option=_OPTIONS),
+                              _ZSTD_LEVEL)
+
+
+def unpack_raw(data: str | bytes) -> bytes:
+    """Return the JSON bytes of a packed value.
+
+    Rows written before compression was introduced are plain TEXT JSON.
+    """
+    if isinstance(data, str):
+        return data.encode()
+    return zstandard.decompress(data)
+
+
+def unpack(data: str | bytes) -> Any:
+    return orjson.loads(unpack_raw(data))
@@ -1,62 +1,160 @@
 from __future__ import annotations
 
-import hashlib
-import json
 import os
+import sqlite3
+from typing import Any
 
-from engine.db import get_conn, init_db
+import xxhash
+
+from engine._json import pack, unpack
+from engine.db import get_conn
 
 TTL_DAYS = int(os.environ.get("CACHE_TTL_DAYS", "7"))
 
+# SQLITE_MAX_VARIABLE_NUMBER (구버전 기본 999) 이하로 IN (...) 분할
+_IN_CHUNK = 900
+
+_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+_INSERT_SQL = (
+    "INSERT OR REPLACE INTO cache "
+    "(cache_key, data, ttl_days, expires_at) "
+    f"VALUES (?, ?, ?, {_NOW} + ? * 86400)"
+)
+
 
 def _make_key(file_hash: str, unit_span: str,
               ruleset_version: str = "1.0") -> str:
     raw = f"{file_hash}|{unit_span}|{ruleset_version}"
-    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+    # 비암호 용도 → xxh3_128 (blake2b와 같은 32 hex 길이)
+    return xxhash.xxh3_128_hexdigest(raw.encode())
 
 
 def get_cached(cache_key: str) -> dict | None:
     """Get cached data if not expired."""
     conn = get_conn()
-    try:
-        row = conn.execute(
-            "SELECT data FROM cache "
-            "WHERE cache_key = ? "
-            "AND julianday('now') - julianday(created_at) < ttl_days",
-            (cache_key,),
-        ).fetchone()
-        if row:
-            return json.loads(row["data"])
-        return None
-    finally:
-        conn.close()
+    row = conn.execute(
+        "SELECT data FROM cache "
+        "WHERE cache_key = ? "
+        f"AND expires_at > {_NOW}",
+        (cache_key,),
+    ).fetchone()
+    if row:
+        return unpack(row["data"])
+    return None
 
 
 def set_cached(cache_key: str, data: dict, ttl_days: int = TTL_DAYS):
     """Store data in cache."""
     conn = get_conn()
-    try:
+    with conn:
         conn.execute(
-            "INSERT OR REPLACE INTO cache (cache_key, data, ttl_days) "
-            "VALUES (?, ?, ?)",
-            (cache_key, json.dumps(data, ensure_ascii=False), ttl_days),
+            _INSERT_SQL,
+            (cache_key, pack(data), ttl_days, ttl_days),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
-def purge_expired():
-    """Remove expired cache entries."""
+def get_cached_many(cache_keys: list[str]) -> dict[str, Any]:
+    """Get all non-expired entries for keys. Returns {cache_key: data}."""
+    conn = get_conn()
+    result: dict[str, Any] = {}
+    keys = list(dict.fromkeys(cache_keys))
+    for i in range(0, len(keys), _IN_CHUNK):
+        chunk = keys[i:i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            "SELECT cache_key, data FROM cache "
+            f"WHERE cache_key IN ({placeholders}) "
+            f"AND expires_at > {_NOW}",
+            chunk,
+        ).fetchall()
+        for row in rows:
+            result[row["cache_key"]] = unpack(row["data"])
+    return result
+
+
+def set_cached_many(items: list[tuple[str, Any]],
+                    ttl_days: int = TTL_DAYS,
+                    conn: sqlite3.Connection | None = None):
+    """Store (cache_key, data) pairs in a single transaction.
+
+    With ``conn`` the rows join the caller's open transaction instead.
+    """
+    if not items:
+        return
+    rows = [(key, pack(data), ttl_days, ttl_days) for key, data in items]
+    if conn is not None:
+        conn.executemany(_INSERT_SQL, rows)
+        return
+    conn = get_conn()
+    with conn:
+        conn.executemany(_INSERT_SQL, rows)
+
+
+def get_file_stamps(paths: list[str],
+                    ) -> dict[str, tuple[tuple[int, int, int], str]]:
+    """Stored stamps. Returns {path: ((mtime_ns, size, ino), hash)}."""
     conn = get_conn()
-    try:
+    result = {}
+    for i in range(0, len(paths), _IN_CHUNK):
+        chunk = paths[i:i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            "SELECT path, mtime_ns, size, ino, content_hash "
+            f"FROM file_stamps WHERE path IN ({placeholders})",
+            chunk,
+        ).fetchall()
+        for row in rows:
+            stamp = (row["mtime_ns"], row["size"], row["ino"])
+            result[row["path"]] = (stamp, row["content_hash"])
+    return result
+
+
+def set_file_stamps(rows: list[tuple[str, int, int, int, str]]):
+    """Upsert (path, mtime_ns, size, ino, content_hash) rows."""
+    if not rows:
+        return
+    conn = get_conn()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO file_stamps "
+            "(path, mtime_ns, size, ino, content_hash, checked_at) "
+            f"VALUES (?, ?, ?, ?, ?, {_NOW})",
+            rows,
+        )
+
+
+def touch_file_stamps(paths: list[str]):
+    """Mark stored stamps as seen now so purge_expired keeps them."""
+    if not paths:
+        return
+    conn = get_conn()
+    with conn:
+        for i in range(0, len(paths), _IN_CHUNK):
+            chunk = paths[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            conn.execute(
+                f"UPDATE file_stamps SET checked_at = {_NOW} "
+                f"WHERE path IN ({placeholders})",
+                chunk,
+            )
+
+
+def purge_expired(stamp_ttl_days: int = TTL_DAYS):
+    """Remove expired cache entries and file stamps unseen for the TTL.
+
+    Stamps are keyed by absolute path, so without this every repo path
+    ever scanned (e.g. per-scan clone dirs) would keep its rows forever.
+    """
+    conn = get_conn()
+    with conn:
+        conn.execute(
+            f"DELETE FROM cache WHERE expires_at <= {_NOW}"
+        )
         conn.execute(
-            "DELETE FROM cache "
-            "WHERE julianday('now') - julianday(created_at) >= ttl_days"
+            "DELETE FROM file_stamps "
+            f"WHERE COALESCE(checked_at, 0) <= {_NOW} - ? * 86400",
+            (stamp_ttl_days,),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def make_unit_cache_key(file_content_hash: str,
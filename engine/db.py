@@ -1,23 +1,101 @@
 from __future__ import annotations
 
+import contextlib
 import sqlite3
+import threading
+import weakref
+from collections.abc import Iterator
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent.parent / "cache" / "ghostcode.db"
 
 
-def get_conn() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+_POOL = threading.local()
+_OPEN: "weakref.WeakSet[_PooledConn]" = weakref.WeakSet()
+_OPEN_LOCK = threading.Lock()
+_generation = 0
+
+
+class _PooledConn:
+    """Per-thread holder; its connection closes when the thread goes away."""
+
+    __slots__ = ("conn", "path", "generation", "close", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection, path: str, generation: int):
+        self.conn = conn
+        self.path = path
+        self.generation = generation
+        # 스레드 종료 시 threading.local이 holder를 놓으면 연결도 닫힘
+        self.close = weakref.finalize(self, conn.close)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # close_all()은 다른 스레드에서 호출될 수 있으므로 same-thread 검사 해제
+    conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
+def get_conn() -> sqlite3.Connection:
+    """Return this thread's pooled connection (reopened if DB_PATH changed).
+
+    Callers must not close it; use ``with conn:`` for write transactions.
+    """
+    path = str(DB_PATH)
+    holder = getattr(_POOL, "holder", None)
+    if (holder is not None and holder.path == path
+            and holder.generation == _generation):
+        return holder.conn
+
+    if holder is not None:
+        # DB_PATH가 바뀐 경우 이전 연결 정리 (close_all 이후면 이미 닫힘)
+        holder.close()
+
+    holder = _PooledConn(_connect(path), path, _generation)
+    with _OPEN_LOCK:
+        _OPEN.add(holder)
+    _POOL.holder = holder
+    return holder.conn
+
+
+@contextlib.contextmanager
+def scan_transaction() -> Iterator[sqlite3.Connection]:
+    """One explicit write transaction for a scan's persistence stage.
+
+    Functions taking ``conn=`` execute inside it without committing.
+    """
+    conn = get_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def close_all():
+    """Close the pooled connections of all live threads. Call on shutdown."""
+    global _generation
+    with _OPEN_LOCK:
+        holders = list(_OPEN)
+        _OPEN.clear()
+        _generation += 1
+    for holder in holders:
+        holder.close()
+
+
 def init_db(conn: sqlite3.Connection | None = None):
-    own = conn is None
-    if own:
+    if conn is None:
         conn = get_conn()
 
     conn.executescript("""
@@ -28,7 +106,7 @@ def init_db(conn: sqlite3.Connection | None = None):
         branch    TEXT,
         scan_type TEXT NOT NULL DEFAULT 'full',
         created_at TEXT NOT NULL DEFAULT (datetime('now')),
-        report_json TEXT
+        report_json BLOB  -- zstd-compressed JSON
     );
 
     CREATE TABLE IF NOT EXISTS units (
@@ -82,9 +160,19 @@ def init_db(conn: sqlite3.Connection | None = None):
 
     CREATE TABLE IF NOT EXISTS cache (
         cache_key  TEXT PRIMARY KEY,
-        data       TEXT NOT NULL,
+        data       BLOB NOT NULL,  -- zstd-compressed JSON
         created_at TEXT NOT NULL DEFAULT (datetime('now')),
-        ttl_days   INTEGER NOT NULL DEFAULT 7
+        ttl_days   INTEGER NOT NULL DEFAULT 7,
+        expires_at INTEGER  -- unix epoch (created_at + ttl_days)
+    );
+
+    CREATE TABLE IF NOT EXISTS file_stamps (
+        path         TEXT PRIMARY KEY,
+        mtime_ns     INTEGER NOT NULL,
+        size         INTEGER NOT NULL,
+        ino          INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        checked_at   INTEGER  -- unix epoch of last scan that saw the path
     );
 
     CREATE INDEX IF NOT EXISTS idx_units_scan
@@ -93,9 +181,29 @@ def init_db(conn: sqlite3.Connection | None = None):
         ON evidence(scan_id);
     CREATE INDEX IF NOT EXISTS idx_scores_scan
         ON scores(scan_id);
-    CREATE INDEX IF NOT EXISTS idx_cache_ttl
-        ON cache(created_at);
     """)
 
-    if own:
-        conn.close()
+    # 구버전 DB: expires_at 컬럼 추가 + 기존 행 채우기
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(cache)")}
+    if "expires_at" not in cols:
+        with conn:
+            conn.execute("ALTER TABLE cache ADD COLUMN expires_at INTEGER")
+            conn.execute(
+                "UPDATE cache SET expires_at = "
+                "CAST(strftime('%s', created_at) AS INTEGER) "
+                "+ ttl_days * 86400"
+            )
+            conn.execute("DROP INDEX IF EXISTS idx_cache_ttl")
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at)")
+
+    # 구버전 DB: file_stamps.checked_at 추가 (purge_expired의 정리 기준)
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(file_stamps)")}
+    if "checked_at" not in cols:
+        with conn:
+            conn.execute(
+                "ALTER TABLE file_stamps ADD COLUMN checked_at INTEGER")
+            conn.execute(
+                "UPDATE file_stamps SET checked_at = "
+                "CAST(strftime('%s', 'now') AS INTEGER)")
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import logging
+import os
 import re
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
 
 from engine.extract import Unit
 
@@ -12,6 +16,14 @@ REFACTOR_SIGNALS = re.compile(
     re.IGNORECASE,
 )
 
+logger = logging.getLogger("ghostcode")
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+LOG_TIMEOUT = 120
+
+_SEC_30D = 30 * 86400
+_SEC_90D = 90 * 86400
+
 
 @dataclass
 class Evidence:
@@ -24,13 +36,11 @@ class Evidence:
     review_evidence_score: int = 0
 
 
-def _run_blame(repo_path: str, file_path: str,
-               start: int, end: int) -> list[dict]:
-    """Run git blame for a line range, return per-line info."""
+def _blame_file(repo_path: str, file_path: str) -> list[dict]:
+    """Run git blame once for the whole file, return per-line info."""
     try:
-        result = subprocess.run(
-            ["git", "blame", "--porcelain",
-             f"-L{start},{end}", "--", file_path],
+        out = subprocess.run(
+            ["git", "blame", "--line-porcelain", "--", file_path],
             cwd=repo_path, capture_output=True, text=True,
             check=True, timeout=30,
         )
@@ -39,8 +49,13 @@ def _run_blame(repo_path: str, file_path: str,
 
     entries = []
     current: dict = {}
-    for line in result.stdout.splitlines():
-        if line.startswith("author "):
+    for line in out.stdout.splitlines():
+        if not current:
+            # header: <sha> <orig_line> <final_line> [<num_lines>]
+            parts = line.split()
+            if len(parts) >= 3 and parts[2].isdigit():
+                current = {"sha": parts[0], "line": int(parts[2])}
+        elif line.startswith("author "):
             current["author"] = line[7:]
         elif line.startswith("author-time "):
             try:
@@ -50,15 +65,31 @@ def _run_blame(repo_path: str, file_path: str,
         elif line.startswith("summary "):
             current["summary"] = line[8:]
         elif line.startswith("\t"):
-            if current:
-                entries.append(current)
-                current = {}
-
-    if current:
-        entries.append(current)
+            entries.append(current)
+            current = {}
     return entries
 
 
+def _run_blame(repo_path: str, file_path: str,
+               spans: list[tuple[int, int]],
+               ) -> dict[tuple[int, int], list[dict]]:
+    """Per-line blame info for each span, sliced from the file blame."""
+    entries = _blame_file(repo_path, file_path)
+    return {(start, end): entries[start - 1:end] for start, end in spans}
+
+
+def _parse_commit_line(line: str) -> dict | None:
+    parts = line.split("|", 3)
+    if len(parts) != 4:
+        return None
+    return {
+        "sha": parts[0],
+        "author": parts[1],
+        "time": int(parts[2]) if parts[2].isdigit() else 0,
+        "summary": parts[3],
+    }
+
+
 def _run_log(repo_path: str, file_path: str,
              start: int, end: int) -> list[dict]:
     """Get commit history touching specific lines."""
@@ -74,14 +105,141 @@ def _run_log(repo_path: str, file_path: str,
 
     commits = []
     for line in result.stdout.splitlines():
-        parts = line.split("|", 3)
-        if len(parts) == 4:
-            commits.append({
-                "sha": parts[0],
-                "author": parts[1],
-                "time": int(parts[2]) if parts[2].isdigit() else 0,
-                "summary": parts[3],
-            })
+        commit = _parse_commit_line(line)
+        if commit:
+            commits.append(commit)
+    return commits
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# (old_start, old_len, new_start, new_len) — unified diff hunk header
+Hunk = tuple[int, int, int, int]
+
+
+_C_ESCAPES = {b"a": 7, b"b": 8, b"t": 9, b"n": 10, b"v": 11, b"f": 12,
+              b"r": 13, b'"': 34, b"\\": 92}
+_C_ESCAPE_RE = re.compile(rb"\\([0-7]{3}|.)")
+
+
+def _header_path(raw: str) -> str:
+    """Path from a diff `+++` header, with git's quoting undone.
+
+    Paths with spaces get a trailing TAB; paths with `"`, `\\` or control
+    characters are C-quoted (octal escapes are UTF-8 bytes).
+    """
+    if raw.endswith("\t"):
+        raw = raw[:-1]
+    if len(raw) < 2 or not (raw.startswith('"') and raw.endswith('"')):
+        return raw
+    return _C_ESCAPE_RE.sub(
+        lambda m: (bytes([int(m[1], 8)]) if len(m[1]) == 3
+                   else bytes([_C_ESCAPES.get(m[1], m[1][0])])),
+        raw[1:-1].encode(),
+    ).decode(errors="replace")
+
+
+def _build_commit_index(repo_path: str, files: list[str],
+                        ) -> dict[str, list[tuple[dict, list[Hunk]]]] | None:
+    """Single `git log -p -U0` pass over all files.
+
+    Returns {file_path: [(commit, hunks), ...]} newest first, or None if
+    git fails or times out. First-parent history keeps hunk line numbers
+    consistent from commit to commit.
+    """
+    index: dict[str, list[tuple[dict, list[Hunk]]]] = {f: [] for f in files}
+    if not files:
+        return index
+    try:
+        # patch 전체를 버퍼링하지 않도록 stdout을 줄 단위로 스트리밍
+        proc = subprocess.Popen(
+            ["git", "-c", "core.quotepath=false", "log",
+             "--first-parent", "-m", "-p", "-U0", "--no-color",
+             "--no-renames", "--no-ext-diff",
+             "--src-prefix=a/", "--dst-prefix=b/",
+             "--format=%x00%H|%an|%at|%s", "--", *files],
+            cwd=repo_path, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, errors="replace",
+        )
+    except OSError:
+        logger.warning("git log failed to start in %s", repo_path)
+        return None
+    timer = threading.Timer(LOG_TIMEOUT, proc.kill)
+    timer.start()
+
+    commit: dict | None = None
+    hunks: list[Hunk] | None = None
+    in_header = False
+    try:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line.startswith("\x00"):
+                commit = _parse_commit_line(line[1:])
+                hunks = None
+            elif line.startswith("diff --git "):
+                in_header = True
+                hunks = None
+            elif in_header and line.startswith("+++ "):
+                path = _header_path(line[4:])
+                path = path[2:] if path.startswith("b/") else ""
+                hunks = None
+                if commit and path in index:
+                    hunks = []
+                    index[path].append((commit, hunks))
+            elif line.startswith("@@"):
+                in_header = False
+                m = _HUNK_RE.match(line)
+                if m and hunks is not None:
+                    a, b, c, d = m.groups()
+                    hunks.append((int(a), 1 if b is None else int(b),
+                                  int(c), 1 if d is None else int(d)))
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        logger.warning("git log over %d files failed in %s (exit %d); "
+                       "falling back to per-unit history",
+                       len(files), repo_path, returncode)
+        return None
+    return index
+
+
+def _to_parent_line(line: int, hunks: list[Hunk], is_start: bool) -> int:
+    """Map a line number in a commit to its position in the parent."""
+    old = line
+    for a, b, c, d in hunks:
+        new_next = c + d if d else c + 1
+        old_next = a + b if b else a + 1
+        if d and c <= line < new_next:
+            # 이 커밋에서 추가된 줄 → 부모의 대응 구간으로 수축
+            if is_start:
+                return a if b else a + 1
+            return a + b - 1 if b else a
+        if line < new_next:
+            break
+        old = line + old_next - new_next
+    return old
+
+
+def _commits_for_span(history: list[tuple[dict, list[Hunk]]],
+                      span: tuple[int, int]) -> list[dict]:
+    """Commits (newest first) whose hunks touched the span's lines."""
+    start, end = span
+    commits = []
+    for commit, hunks in history:
+        if start > end:
+            break  # 범위가 생성된 커밋보다 과거
+        for a, b, c, d in hunks:
+            if d:
+                touched = c <= end and c + d - 1 >= start
+            else:
+                touched = start <= c < end
+            if touched:
+                commits.append(commit)
+                break
+        start = _to_parent_line(start, hunks, True)
+        end = _to_parent_line(end, hunks, False)
     return commits
 
 
@@ -103,11 +261,16 @@ def _calc_score(distinct_authors: int,
     return min(100, score)
 
 
-def collect_evidence(repo_path: str, unit: Unit) -> Evidence:
+def collect_evidence(repo_path: str, unit: Unit,
+                     blame_entries: list[dict] | None = None,
+                     log_entries: list[dict] | None = None) -> Evidence:
     """Collect git-based evidence for a single unit."""
     start, end = unit.span
-    blame_entries = _run_blame(repo_path, unit.file_path, start, end)
-    log_entries = _run_log(repo_path, unit.file_path, start, end)
+    if blame_entries is None:
+        blame_entries = _run_blame(
+            repo_path, unit.file_path, [unit.span])[unit.span]
+    if log_entries is None:
+        log_entries = _run_log(repo_path, unit.file_path, start, end)
 
     # distinct authors from blame
     authors = {e.get("author", "") for e in blame_entries if e.get("author")}
@@ -117,21 +280,22 @@ def collect_evidence(repo_path: str, unit: Unit) -> Evidence:
     unique_shas = {e["sha"] for e in log_entries if "sha" in e}
     touched_after = len(unique_shas) > 1
 
-    # touch counts by time window
-    now = datetime.now().timestamp()
-    d30 = now - timedelta(days=30).total_seconds()
-    d90 = now - timedelta(days=90).total_seconds()
-
-    touch_30 = sum(1 for e in log_entries if e.get("time", 0) > d30)
-    touch_90 = sum(1 for e in log_entries if e.get("time", 0) > d90)
+    # touch counts by time window (단일 패스)
+    now = int(time.time())
+    t30 = now - _SEC_30D
+    t90 = now - _SEC_90D
 
-    # commit signal detection
-    signals = []
+    touch_30 = touch_90 = 0
     for e in log_entries:
-        s = e.get("summary", "")
-        found = REFACTOR_SIGNALS.findall(s)
-        signals.extend(found)
-    signals = list(set(s.lower() for s in signals))
+        t = e.get("time", 0)
+        if t > t90:
+            touch_90 += 1
+            if t > t30:
+                touch_30 += 1
+
+    # commit signal detection (summary 전체를 묶어 findall 1회)
+    joined = "\n".join(e.get("summary", "") for e in log_entries)
+    signals = list({m.lower() for m in REFACTOR_SIGNALS.findall(joined)})
 
     score = _calc_score(distinct_authors, touched_after,
                         touch_90, len(signals) > 0)
@@ -150,7 +314,34 @@ def collect_evidence(repo_path: str, unit: Unit) -> Evidence:
 def collect_all_evidence(repo_path: str,
                          units: list[Unit]) -> dict[str, Evidence]:
     """Collect evidence for all units. Returns {unit_id: Evidence}."""
-    result = {}
+    by_file: dict[str, list[Unit]] = {}
     for unit in units:
-        result[unit.id] = collect_evidence(repo_path, unit)
-    return result
+        by_file.setdefault(unit.file_path, []).append(unit)
+
+    # git subprocess 대기 중에는 GIL이 풀리므로 스레드로 충분
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        # 전체 파일 history는 git log 1회로 (unit별 -L 대신)
+        index_future = ex.submit(
+            _build_commit_index, repo_path, list(by_file))
+        # 파일당 blame 1회 (이번 스캔 전용), unit 범위는 메모리에서 슬라이스
+        blames = dict(zip(by_file, ex.map(
+            lambda f: _blame_file(repo_path, f), by_file)))
+        index = index_future.result()
+        if index is None:
+            # 일괄 history 실패 시 unit별 -L 경로로 대체
+            logs = list(ex.map(
+                lambda u: _run_log(repo_path, u.file_path, *u.span),
+                units))
+        else:
+            logs = [_commits_for_span(index[u.file_path], u.span)
+                    for u in units]
+
+    return {
+        unit.id: collect_evidence(
+            repo_path, unit,
+            blame_entries=blames[unit.file_path][
+                unit.span[0] - 1:unit.span[1]],
+            log_entries=log_entries,
+        )
+        for unit, log_entries in zip(units, logs)
+    }
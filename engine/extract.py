@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -19,6 +22,23 @@ LANG_MAP = {
     ".js": JS_LANG,
 }
 
+# 번들/minified 파일 등 거대 파일은 파싱 생략
+MAX_FILE_BYTES = 512 * 1024
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+# Parser는 스레드 간 공유 불가 → 스레드별로 언어당 1개씩 재사용
+_LOCAL = threading.local()
+
+
+def _get_parser(ext: str) -> Parser:
+    parsers = getattr(_LOCAL, "parsers", None)
+    if parsers is None:
+        parsers = _LOCAL.parsers = {}
+    parser = parsers.get(ext)
+    if parser is None:
+        parser = parsers[ext] = Parser(LANG_MAP[ext])
+    return parser
+
 
 @dataclass
 class Unit:
@@ -44,159 +64,157 @@ class Unit:
 
 def _make_id(file_path: str, name: str, span: tuple[int, int]) -> str:
     raw = f"{file_path}:{name}:{span[0]}:{span[1]}"
-    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+NESTING_TYPES = frozenset({
+    "if_statement", "for_statement", "for_in_statement",
+    "while_statement", "do_statement", "switch_statement",
+    "try_statement", "ternary_expression",
+})
+BRANCH_TYPES = frozenset({
+    "if_statement", "else_clause", "switch_case", "ternary_expression",
+})
+CALLBACK_TYPES = frozenset({"arrow_function", "function_expression"})
+JSX_TYPES = frozenset({
+    "jsx_element", "jsx_self_closing_element", "jsx_fragment",
+})
+SIDE_EFFECT_NAMES = frozenset({
+    "fetch", "localStorage", "sessionStorage", "XMLHttpRequest",
+})
+
+AMBIGUOUS_NAMES = frozenset({
+    "data", "tmp", "temp", "result", "res", "ret", "val",
+    "value", "item", "items", "obj", "arr", "list", "info",
+    "response", "output", "input", "x", "y", "z", "a", "b",
+    "foo", "bar", "baz", "cb", "fn", "func", "handler",
+})
+# 노드 text(bytes)를 decode 없이 바로 비교하기 위한 ASCII 버전
+_AMBIGUOUS_BYTES = frozenset(n.encode() for n in AMBIGUOUS_NAMES)
+
 
+@dataclass
+class _Metrics:
+    nesting_depth: int = 0
+    branch_count: int = 0
+    early_return_count: int = 0
+    try_catch_count: int = 0
+    hook_calls: list[str] = field(default_factory=list)
+    boolean_complexity: int = 0
+    callback_depth: int = 0
+    render_side_effects: int = 0
+    identifier_ambiguity: float = 0.0
+    has_jsx: bool = False
+
+
+def _collect_metrics(node: Node) -> _Metrics:
+    """Compute all structural metrics of a function in a single DFS.
+
+    Walks with a TreeCursor; ``stack`` holds, per ancestor level, the state
+    inherited by its children: (nesting, callback depth, inside body,
+    is body).
+    """
+    m = _Metrics()
+    returns_in_body = 0
+    identifiers = 0
+    ambiguous = 0
+
+    cursor = node.walk()
+    stack: list[tuple[int, int, bool, bool]] = []
+    while True:
+        n = cursor.node
+        t = n.type
+        nest, cb, in_body, parent_is_body = (
+            stack[-1] if stack else (0, 0, False, False))
+
+        is_body = len(stack) == 1 and cursor.field_name == "body"
+        if in_body:
+            # body 하위 노드만 callback depth 대상 (body 자신은 제외)
+            if t in CALLBACK_TYPES:
+                cb += 1
+            if cb > m.callback_depth:
+                m.callback_depth = cb
+        if stack and t in NESTING_TYPES:
+            nest += 1
+            if nest > m.nesting_depth:
+                m.nesting_depth = nest
+        in_body = in_body or is_body
+
+        if t in BRANCH_TYPES:
+            m.branch_count += 1
+        elif t == "binary_expression":
+            op = n.child_by_field_name("operator")
+            if op is not None:
+                if op.type in ("&&", "||"):
+                    m.branch_count += 1
+                    m.boolean_complexity += 1
+                elif op.type == "??":
+                    m.branch_count += 1
+        elif t == "try_statement":
+            m.try_catch_count += 1
+        elif t == "identifier":
+            text = n.text
+            if text:
+                identifiers += 1
+                if text.lower() in _AMBIGUOUS_BYTES:
+                    ambiguous += 1
+        elif t == "call_expression":
+            fn = n.child_by_field_name("function")
+            if fn and fn.text:
+                name = fn.text.decode("utf-8", errors="replace")
+                if name.startswith("use") and name[3:4].isupper():
+                    m.hook_calls.append(name)
+                if in_body and name in SIDE_EFFECT_NAMES:
+                    m.render_side_effects += 1
+        elif t == "return_statement":
+            if parent_is_body:
+                returns_in_body += 1
+        elif in_body and t in JSX_TYPES:
+            m.has_jsx = True
+
+        if cursor.goto_first_child():
+            stack.append((nest, cb, in_body, is_body))
+            continue
+        while not cursor.goto_next_sibling():
+            if not stack:
+                break
+            cursor.goto_parent()
+            stack.pop()
+        else:
+            continue
+        break
 
-def _classify_kind(name: str, node: Node) -> str:
+    m.early_return_count = max(0, returns_in_body - 1)
+    if identifiers:
+        m.identifier_ambiguity = ambiguous / identifiers
+    return m
+
+
+def _classify_kind(name: str, has_jsx: bool) -> str:
     if name.startswith("use") and name[3:4].isupper():
         return "hook"
-    if _has_jsx_return(node):
+    if has_jsx:
         return "component"
     return "function"
 
 
 def _has_jsx_return(node: Node) -> bool:
     """Check if function body contains JSX return."""
-    body = node.child_by_field_name("body")
-    if body is None:
-        return False
-    for child in _walk(body):
-        if child.type in ("jsx_element", "jsx_self_closing_element",
-                          "jsx_fragment"):
-            return True
-    return False
-
+    return _collect_metrics(node).has_jsx
 
-def _walk(node: Node):
-    """Depth-first walk of all descendants."""
-    yield node
-    for child in node.children:
-        yield from _walk(child)
 
-
-def _max_nesting(node: Node, depth: int = 0) -> int:
+def _max_nesting(node: Node) -> int:
     """Calculate max nesting depth of control flow."""
-    nesting_types = {
-        "if_statement", "for_statement", "for_in_statement",
-        "while_statement", "do_statement", "switch_statement",
-        "try_statement", "ternary_expression",
-    }
-    max_d = depth
-    for child in node.children:
-        if child.type in nesting_types:
-            max_d = max(max_d, _max_nesting(child, depth + 1))
-        else:
-            max_d = max(max_d, _max_nesting(child, depth))
-    return max_d
+    return _collect_metrics(node).nesting_depth
 
 
 def _count_branches(node: Node) -> int:
-    branch_types = {
-        "if_statement", "else_clause", "switch_case",
-        "ternary_expression", "binary_expression",
-    }
-    count = 0
-    for child in _walk(node):
-        if child.type in branch_types:
-            if child.type == "binary_expression":
-                op = child.child_by_field_name("operator")
-                if op and op.type in ("&&", "||", "??"):
-                    count += 1
-            else:
-                count += 1
-    return count
-
-
-def _count_early_returns(node: Node) -> int:
-    body = node.child_by_field_name("body")
-    if body is None:
-        return 0
-    stmts = [c for c in body.children if c.type == "return_statement"]
-    return max(0, len(stmts) - 1)
-
-
-def _count_try_catch(node: Node) -> int:
-    return sum(1 for c in _walk(node) if c.type == "try_statement")
-
-
-def _extract_hooks(node: Node) -> list[str]:
-    hooks = []
-    for c in _walk(node):
-        if c.type == "call_expression":
-            fn = c.child_by_field_name("function")
-            if fn and fn.text:
-                name = fn.text.decode("utf-8", errors="replace")
-                if name.startswith("use") and name[3:4].isupper():
-                    hooks.append(name)
-    return hooks
+    return _collect_metrics(node).branch_count
 
 
 def _count_callback_depth(node: Node) -> int:
     """Calculate max nesting depth of arrow functions / function expressions."""
-    callback_types = {"arrow_function", "function_expression"}
-
-    def _recurse(n: Node, depth: int) -> int:
-        max_d = depth
-        for child in n.children:
-            if child.type in callback_types:
-                max_d = max(max_d, _recurse(child, depth + 1))
-            else:
-                max_d = max(max_d, _recurse(child, depth))
-        return max_d
-
-    # Start from body to skip the function itself if it's an arrow/expression
-    body = node.child_by_field_name("body")
-    if body is None:
-        return 0
-    return _recurse(body, 0)
-
-
-def _count_boolean_complexity(node: Node) -> int:
-    count = 0
-    for c in _walk(node):
-        if c.type == "binary_expression":
-            op = c.child_by_field_name("operator")
-            if op and op.type in ("&&", "||"):
-                count += 1
-    return count
-
-
-def _count_render_side_effects(node: Node) -> int:
-    """Count fetch/storage calls outside useEffect in component body."""
-    side_effect_names = {
-        "fetch", "localStorage", "sessionStorage", "XMLHttpRequest",
-    }
-    count = 0
-    body = node.child_by_field_name("body")
-    if body is None:
-        return 0
-    for c in _walk(body):
-        if c.type == "call_expression":
-            fn = c.child_by_field_name("function")
-            if fn and fn.text:
-                fn_name = fn.text.decode("utf-8", errors="replace")
-                if fn_name in side_effect_names:
-                    count += 1
-    return count
-
-
-AMBIGUOUS_NAMES = {
-    "data", "tmp", "temp", "result", "res", "ret", "val",
-    "value", "item", "items", "obj", "arr", "list", "info",
-    "response", "output", "input", "x", "y", "z", "a", "b",
-    "foo", "bar", "baz", "cb", "fn", "func", "handler",
-}
-
-
-def _calc_identifier_ambiguity(node: Node) -> float:
-    identifiers = []
-    for c in _walk(node):
-        if c.type == "identifier" and c.text:
-            identifiers.append(c.text.decode("utf-8", errors="replace"))
-    if not identifiers:
-        return 0.0
-    ambiguous = sum(1 for i in identifiers if i.lower() in AMBIGUOUS_NAMES)
-    return ambiguous / len(identifiers)
+    return _collect_metrics(node).callback_depth
 
 
 def _get_function_node_and_name(node: Node):
@@ -234,42 +252,65 @@ def _build_unit(file_path: str, func_node: Node, name: str) -> Unit:
     start = func_node.start_point.row + 1
     end = func_node.end_point.row + 1
     source = func_node.text.decode("utf-8", errors="replace")
+    m = _collect_metrics(func_node)
 
     return Unit(
         id=_make_id(file_path, name, (start, end)),
         file_path=file_path,
         name=name,
-        kind=_classify_kind(name, func_node),
+        kind=_classify_kind(name, m.has_jsx),
         span=(start, end),
         loc=end - start + 1,
-        nesting_depth=_max_nesting(func_node),
-        branch_count=_count_branches(func_node),
-        early_return_count=_count_early_returns(func_node),
-        try_catch_count=_count_try_catch(func_node),
-        hook_calls=_extract_hooks(func_node),
-        boolean_complexity=_count_boolean_complexity(func_node),
-        callback_depth=_count_callback_depth(func_node),
-        render_side_effects=_count_render_side_effects(func_node),
-        identifier_ambiguity=_calc_identifier_ambiguity(func_node),
+        nesting_depth=m.nesting_depth,
+        branch_count=m.branch_count,
+        early_return_count=m.early_return_count,
+        try_catch_count=m.try_catch_count,
+        hook_calls=m.hook_calls,
+        boolean_complexity=m.boolean_complexity,
+        callback_depth=m.callback_depth,
+        render_side_effects=m.render_side_effects,
+        identifier_ambiguity=m.identifier_ambiguity,
         source=source,
     )
 
 
+def _read_source(path: str) -> bytes | None:
+    """Read file bytes; None if unreadable or larger than MAX_FILE_BYTES."""
+    try:
+        try:
+            fd = os.open(path, os.O_RDONLY | _O_NOATIME)
+        except PermissionError:
+            # O_NOATIME은 파일 소유자만 가능
+            fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size > MAX_FILE_BYTES:
+                return None
+            chunks = []
+            while size > 0:
+                chunk = os.read(fd, size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size -= len(chunk)
+            return b"".join(chunks)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+
+
 def parse_file(file_path: str, repo_path: str) -> list[Unit]:
     """Parse a single TS/JS file and extract all units."""
     ext = Path(file_path).suffix
-    lang = LANG_MAP.get(ext)
-    if lang is None:
+    if ext not in LANG_MAP:
         return []
 
-    full_path = Path(repo_path) / file_path
-    try:
-        source = full_path.read_bytes()
-    except (OSError, IOError):
+    source = _read_source(os.path.join(repo_path, file_path))
+    if source is None:
         return []
 
-    parser = Parser(lang)
-    tree = parser.parse(source)
+    tree = _get_parser(ext).parse(source)
     units = []
 
     for node in tree.root_node.children:
@@ -281,8 +322,8 @@ def parse_file(file_path: str, repo_path: str) -> list[Unit]:
 
 
 def extract_all(repo_path: str, files: list[str]) -> list[Unit]:
-    """Extract units from all files."""
-    all_units = []
-    for f in files:
-        all_units.extend(parse_file(f, repo_path))
-    return all_units
+    """Extract units from all files (parsed concurrently, order kept)."""
+    # tree-sitter parse는 C 레벨에서 GIL을 해제
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        results = ex.map(lambda f: parse_file(f, repo_path), files)
+        return [u for units in results for u in units]
@@ -4,7 +4,6 @@ import os
 import subprocess
 import tempfile
 from dataclasses import dataclass, field
-from pathlib import Path
 
 EXCLUDE_DIRS = {
     "node_modules", "dist", "build", ".next", "coverage",
@@ -57,28 +56,34 @@ def get_branch(repo_path: str) -> str:
     return result.stdout.strip()
 
 
-def _should_exclude(path: Path) -> bool:
-    parts = path.parts
-    if any(d in EXCLUDE_DIRS for d in parts):
-        return True
-    name = path.name
-    if any(name.endswith(p) for p in EXCLUDE_PATTERNS):
-        return True
-    return False
+def _is_target_file(name: str) -> bool:
+    if os.path.splitext(name)[1] not in INCLUDE_EXTENSIONS:
+        return False
+    return not any(name.endswith(p) for p in EXCLUDE_PATTERNS)
+
+
+def _scan_dir(path: str, root: str, out: list[str], limit: int):
+    """DFS over path; excluded dirs are pruned before descending."""
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return  # 읽을 수 없는 디렉터리는 건너뜀
+    with it:
+        for e in it:
+            if len(out) >= limit:
+                return
+            if e.is_dir(follow_symlinks=False):
+                if e.name not in EXCLUDE_DIRS:
+                    _scan_dir(e.path, root, out, limit)
+            elif _is_target_file(e.name) and e.is_file():
+                out.append(os.path.relpath(e.path, root))
 
 
 def collect_files(repo_path: str,
                   max_files: int = 1000) -> list[str]:
     """Collect TS/JS files, excluding vendor/build artifacts."""
-    root = Path(repo_path)
-    files = []
-    for ext in INCLUDE_EXTENSIONS:
-        for p in root.rglob(f"*{ext}"):
-            if _should_exclude(p.relative_to(root)):
-                continue
-            files.append(str(p.relative_to(root)))
-            if len(files) >= max_files:
-                return files
+    files: list[str] = []
+    _scan_dir(repo_path, repo_path, files, max_files)
     return sorted(files)
 
 
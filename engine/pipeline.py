@@ -1,135 +1,267 @@
 from __future__ import annotations
 
-import hashlib
-import json
 import logging
+import os
+import sqlite3
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import xxhash
+
 from engine.ingest import ingest, clone_repo
-from engine.extract import extract_all, parse_file, Unit
+from engine.extract import extract_all, Unit, _make_id
 from engine.evidence import collect_all_evidence, Evidence
 from engine.scores import score_all, UnitScores
 from engine.similarity import find_clusters
-from engine.rules import load_rules, match_rules
+from engine.rules import load_rules, match_all_rules, Rule, RuleMatch
 from engine.report import build_report, render_pr_comment, save_json
-from engine.cache import get_cached, set_cached, _make_key
-from engine.db import get_conn, init_db
+from engine.cache import (
+    get_cached_many, set_cached_many, get_file_stamps, set_file_stamps,
+    touch_file_stamps,
+    _make_key,
+)
+from engine.db import get_conn, init_db, scan_transaction
+from engine._json import pack
 
 logger = logging.getLogger("ghostcode")
 
 RULES_PATH = Path(__file__).parent.parent / "rules" / "react-ts.yaml"
+# 규칙 체커 로직이 바뀌면 올릴 것 (캐시된 rule match 무효화)
 RULESET_VERSION = "1.0"
+# 캐시 payload 형식: 바뀌면 키가 달라져 예전 행은 TTL로 자연 만료
+CACHE_FORMAT = "3"
+# extract 결과(유닛 판별/메트릭)가 바뀌면 올릴 것 (캐시된 유닛 무효화)
+EXTRACT_VERSION = "1"
+
+_HASH_WHOLE_FILE_LIMIT = 1024 * 1024
+_HASH_CHUNK = 64 * 1024
+_RACY_STAMP_NS = 2_000_000_000
+HASH_WORKERS = (os.cpu_count() or 1) * 2
+
 
+def _file_content_hash(repo_path: str, file_path: str,
+                       size: int | None = None) -> str:
+    """xxh3_64 hash of file content for cache keying (16 hex chars).
 
-def _file_content_hash(repo_path: str, file_path: str) -> str:
-    """SHA256 hash of file content for cache keying."""
-    full = Path(repo_path) / file_path
+    ``size`` is the already-stat'ed file size, if known; it only picks
+    the read strategy, so a stale value is harmless.
+    """
+    full = os.path.join(repo_path, file_path)
     try:
-        data = full.read_bytes()
-        return hashlib.sha256(data).hexdigest()[:16]
+        with open(full, "rb", buffering=0) as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if size <= _HASH_WHOLE_FILE_LIMIT:
+                return xxhash.xxh3_64(f.read()).hexdigest()
+            # 큰 파일은 고정 버퍼로 증분 해싱
+            h = xxhash.xxh3_64()
+            buf = bytearray(_HASH_CHUNK)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                h.update(view[:n])
+            return h.hexdigest()
     except (OSError, IOError):
         return ""
 
 
-def _unit_cache_key(file_hash: str, unit: Unit) -> str:
-    """Build cache key from file hash + unit span + ruleset version."""
+def _file_hashes(repo_path: str, file_paths: list[str]) -> dict[str, str]:
+    """Content hash per file ("" if unreadable).
+
+    Files whose (mtime_ns, size, inode) match the stored stamp reuse the
+    stored hash without being read.
+    """
+    hashes = {fp: "" for fp in file_paths}
+    stamps: dict[str, tuple[str, tuple[int, int, int]]] = {}
+    for fp in hashes:
+        full = os.path.join(os.path.abspath(repo_path), fp)
+        try:
+            st = os.stat(full)
+        except OSError:
+            continue
+        stamps[fp] = (full, (st.st_mtime_ns, st.st_size, st.st_ino))
+
+    known = get_file_stamps([full for full, _ in stamps.values()])
+    # mtime 해상도 안에서 재수정될 수 있는 파일은 stamp 저장 안 함
+    racy_after = time.time_ns() - _RACY_STAMP_NS
+    changed = []
+    seen = []
+    for fp, (full, stamp) in stamps.items():
+        stored = known.get(full)
+        if stored and stored[0] == stamp:
+            hashes[fp] = stored[1]
+            seen.append(full)
+        else:
+            changed.append(fp)
+    touch_file_stamps(seen)
+
+    # read + xxhash는 GIL을 해제하므로 스레드로 병렬화
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as ex:
+        computed = ex.map(
+            lambda fp: _file_content_hash(repo_path, fp, stamps[fp][1][1]),
+            changed)
+        fresh = []
+        for fp, h in zip(changed, computed):
+            hashes[fp] = h
+            full, stamp = stamps[fp]
+            if h and stamp[0] < racy_after:
+                fresh.append((full, *stamp, h))
+    set_file_stamps(fresh)
+    return hashes
+
+
+def _extract_cache_key(file_path: str, file_hash: str) -> str:
+    # 확장자가 grammar를 결정 (같은 바이트도 .ts/.tsx 파싱 결과가 다름)
+    return _make_key(file_hash, f"units{Path(file_path).suffix}",
+                     f"x{EXTRACT_VERSION}")
+
+
+def _unit_fields(u: Unit) -> list:
+    # Unit 필드 순서 (id / file_path 제외: 경로에서 다시 계산)
+    return [u.name, u.kind, u.span, u.loc, u.nesting_depth,
+            u.branch_count, u.early_return_count, u.try_catch_count,
+            u.hook_calls, u.has_cleanup, u.render_side_effects,
+            u.boolean_complexity, u.callback_depth,
+            u.identifier_ambiguity, u.context_switches, u.source]
+
+
+def _unit_from_fields(file_path: str, data: list) -> Unit:
+    name, kind, span, *rest = data
+    span = (span[0], span[1])
+    return Unit(_make_id(file_path, name, span), file_path, name, kind,
+                span, *rest)
+
+
+def _cached_extract(repo_path: str, files: list[str],
+                    ) -> tuple[list[Unit], dict[str, str]]:
+    """Extract units, reusing cached units for files with known content.
+
+    Returns (units, file_hashes); the hashes are passed on to
+    _cached_scan so files are not hashed twice.
+    """
+    file_hashes = _file_hashes(repo_path, files)
+    keys = {fp: _extract_cache_key(fp, h) for fp, h in file_hashes.items() if h}
+    cached = get_cached_many(list(keys.values()))
+
+    per_file: dict[str, list[Unit]] = {}
+    miss_files = []
+    for fp in files:
+        key = keys.get(fp)
+        data = cached.get(key) if key else None
+        # 유닛이 없는 파일도 빈 리스트로 캐시됨 → None만 miss
+        if data is None:
+            miss_files.append(fp)
+        else:
+            per_file[fp] = [_unit_from_fields(fp, d) for d in data]
+
+    if miss_files:
+        for fp in miss_files:
+            per_file[fp] = []
+        for u in extract_all(repo_path, miss_files):
+            per_file[u.file_path].append(u)
+        set_cached_many([
+            (keys[fp], [_unit_fields(u) for u in per_file[fp]])
+            for fp in miss_files if fp in keys])
+
+    units = [u for fp in files for u in per_file[fp]]
+    return units, file_hashes
+
+
+def _ruleset_key(rules: list[Rule]) -> str:
+    """Fingerprint of the loaded rules (cached matches depend on them)."""
+    h = xxhash.xxh3_64(RULESET_VERSION.encode())
+    for r in rules:
+        h.update("\0".join((r.id, r.name, r.when, r.severity,
+                             r.action)).encode())
+        h.update(b"\1")
+    return h.hexdigest()
+
+
+def _unit_cache_key(file_hash: str, unit: Unit, ruleset_key: str) -> str:
+    """Build cache key from file hash + unit span + ruleset fingerprint."""
     span_str = f"{unit.span[0]}:{unit.span[1]}"
-    return _make_key(file_hash, span_str, RULESET_VERSION)
+    return _make_key(file_hash, span_str,
+                     f"{ruleset_key}+c{CACHE_FORMAT}")
 
 
-def _cached_scan(repo_path: str, units: list[Unit]) -> tuple[
+def _cached_scan(repo_path: str, units: list[Unit],
+                 rules: list[Rule],
+                 file_hashes: dict[str, str] | None = None) -> tuple[
     dict[str, Evidence], dict[str, UnitScores],
-    list[Unit], list[Unit],
+    dict[str, list[RuleMatch]], list[Unit], list[Unit], dict[str, str],
 ]:
     """Check cache for each unit. Returns (cached_ev, cached_scores,
-    hit_units, miss_units)."""
+    cached_rm, hit_units, miss_units, unit_keys).
+
+    ``file_hashes`` (from _cached_extract) skips re-hashing the files.
+    """
     cached_ev: dict[str, Evidence] = {}
     cached_scores: dict[str, UnitScores] = {}
+    cached_rm: dict[str, list[RuleMatch]] = {}
     hit_units: list[Unit] = []
     miss_units: list[Unit] = []
 
-    # Group units by file for hash efficiency
-    file_hashes: dict[str, str] = {}
-    for u in units:
-        if u.file_path not in file_hashes:
-            file_hashes[u.file_path] = _file_content_hash(
-                repo_path, u.file_path)
+    if file_hashes is None:
+        # Group units by file for hash efficiency
+        file_hashes = _file_hashes(
+            repo_path, list(dict.fromkeys(u.file_path for u in units)))
 
+    ruleset_key = _ruleset_key(rules)
+    unit_keys: dict[str, str] = {}
     for u in units:
         fh = file_hashes.get(u.file_path, "")
-        if not fh:
-            miss_units.append(u)
-            continue
-        key = _unit_cache_key(fh, u)
-        cached = get_cached(key)
+        if fh:
+            unit_keys[u.id] = _unit_cache_key(fh, u, ruleset_key)
+    cache_rows = get_cached_many(list(unit_keys.values()))
+
+    for u in units:
+        key = unit_keys.get(u.id)
+        cached = cache_rows.get(key) if key else None
         if cached:
-            # Restore from cache
-            ev_data = cached.get("evidence", {})
-            sc_data = cached.get("scores", {})
-            cached_ev[u.id] = Evidence(
-                unit_id=u.id,
-                distinct_authors=ev_data.get("distinct_authors", 0),
-                touched_after_creation=ev_data.get(
-                    "touched_after_creation", False),
-                touch_count_30d=ev_data.get("touch_count_30d", 0),
-                touch_count_90d=ev_data.get("touch_count_90d", 0),
-                commit_signals=ev_data.get("commit_signals", []),
-                review_evidence_score=ev_data.get(
-                    "review_evidence_score", 0),
-            )
-            cached_scores[u.id] = UnitScores(
-                unit_id=u.id,
-                cognitive_load=sc_data.get("cognitive_load", 0),
-                review_evidence=sc_data.get("review_evidence", 0),
-                shadow=sc_data.get("shadow", False),
-                fragility=sc_data.get("fragility", 0),
-                redundancy_cluster_id=sc_data.get(
-                    "redundancy_cluster_id"),
-            )
+            # Restore from cache: [evidence, scores, rule matches] (positional)
+            ev_data, sc_data, rm_data = cached
+            cached_ev[u.id] = Evidence(u.id, *ev_data)
+            cached_scores[u.id] = UnitScores(u.id, *sc_data)
+            cached_rm[u.id] = [RuleMatch(*m) for m in rm_data]
             hit_units.append(u)
         else:
             miss_units.append(u)
 
-    return cached_ev, cached_scores, hit_units, miss_units
+    return (cached_ev, cached_scores, cached_rm,
+            hit_units, miss_units, unit_keys)
 
 
-def _store_cache(repo_path: str, miss_units: list[Unit],
+def _store_cache(miss_units: list[Unit],
                  ev_map: dict[str, Evidence],
-                 scores_map: dict[str, UnitScores]):
-    """Store computed results in cache for miss units."""
-    file_hashes: dict[str, str] = {}
-    for u in miss_units:
-        if u.file_path not in file_hashes:
-            file_hashes[u.file_path] = _file_content_hash(
-                repo_path, u.file_path)
-
+                 scores_map: dict[str, UnitScores],
+                 rm_map: dict[str, list[RuleMatch]],
+                 unit_keys: dict[str, str],
+                 conn: sqlite3.Connection | None = None):
+    """Store computed results in cache for miss units.
+
+    ``unit_keys`` comes from _cached_scan, so files are not re-hashed.
+    """
+    items: list[tuple[str, list]] = []
     for u in miss_units:
-        fh = file_hashes.get(u.file_path, "")
-        if not fh:
+        key = unit_keys.get(u.id)
+        if not key:
             continue
-        key = _unit_cache_key(fh, u)
         ev = ev_map.get(u.id)
         sc = scores_map.get(u.id)
         if ev and sc:
-            data = {
-                "evidence": {
-                    "distinct_authors": ev.distinct_authors,
-                    "touched_after_creation": ev.touched_after_creation,
-                    "touch_count_30d": ev.touch_count_30d,
-                    "touch_count_90d": ev.touch_count_90d,
-                    "commit_signals": ev.commit_signals,
-                    "review_evidence_score": ev.review_evidence_score,
-                },
-                "scores": {
-                    "cognitive_load": sc.cognitive_load,
-                    "review_evidence": sc.review_evidence,
-                    "shadow": sc.shadow,
-                    "fragility": sc.fragility,
-                    "redundancy_cluster_id": sc.redundancy_cluster_id,
-                },
-            }
-            set_cached(key, data)
+            # Evidence / UnitScores 필드 순서 (unit_id 제외) 그대로 저장
+            data = [
+                [ev.distinct_authors, ev.touched_after_creation,
+                 ev.touch_count_30d, ev.touch_count_90d,
+                 ev.commit_signals, ev.review_evidence_score],
+                [sc.cognitive_load, sc.review_evidence, sc.shadow,
+                 sc.fragility, sc.redundancy_cluster_id],
+                [[m.rule_id, m.name, m.severity, m.action, m.detail]
+                 for m in rm_map.get(u.id, [])],
+            ]
+            items.append((key, data))
+    set_cached_many(items, conn=conn)
 
 
 def run_full_scan(repo_path: str, repo_name: str = "") -> dict:
@@ -139,11 +271,12 @@ def run_full_scan(repo_path: str, repo_name: str = "") -> dict:
     if not repo_name:
         repo_name = Path(repo_path).name
 
-    units = extract_all(result.repo_path, result.files)
+    units, file_hashes = _cached_extract(result.repo_path, result.files)
+    rules = load_rules(RULES_PATH)
 
     # Cache lookup
-    cached_ev, cached_scores, hit_units, miss_units = _cached_scan(
-        result.repo_path, units)
+    cached_ev, cached_scores, cached_rm, hit_units, miss_units, unit_keys = (
+        _cached_scan(result.repo_path, units, rules, file_hashes))
     cache_hits = len(hit_units)
     cache_misses = len(miss_units)
     if cache_hits > 0:
@@ -153,21 +286,23 @@ def run_full_scan(repo_path: str, repo_name: str = "") -> dict:
     if miss_units:
         new_ev = collect_all_evidence(result.repo_path, miss_units)
         new_scores = score_all(miss_units, new_ev)
-        # Store in cache
-        _store_cache(result.repo_path, miss_units, new_ev, new_scores)
+        new_rm = match_all_rules(miss_units, rules)
     else:
         new_ev = {}
         new_scores = {}
+        new_rm = {}
 
     # Merge cached + new
-    ev_map = {**cached_ev, **new_ev}
-    scores = {**cached_scores, **new_scores}
+    # hit/miss 유닛은 서로 겹치지 않으므로 캐시 dict에 그대로 병합
+    cached_ev.update(new_ev)
+    cached_scores.update(new_scores)
+    cached_rm.update(new_rm)
+    ev_map = cached_ev
+    scores = cached_scores
+    rm_map = cached_rm
 
     clusters = find_clusters(units)
 
-    rules = load_rules(RULES_PATH)
-    rm_map = {u.id: match_rules(u, rules) for u in units}
-
     report = build_report(
         repo_name=repo_name,
         commit_sha=result.commit_sha,
@@ -180,15 +315,21 @@ def run_full_scan(repo_path: str, repo_name: str = "") -> dict:
         rule_matches_map=rm_map,
     )
 
-    _store_report(report)
+    # 스캔 결과 쓰기는 단일 트랜잭션으로
+    with scan_transaction() as conn:
+        _store_cache(miss_units, new_ev, new_scores, new_rm, unit_keys,
+                     conn=conn)
+        _store_report(report, conn=conn)
+    _optimize_db()
     return report
 
 
 def run_pr_scan(repo_path: str, repo_name: str,
-                pr_number: int, head_sha: str) -> dict:
+                pr_number: int, head_sha: str,
+                base_ref: str | None = None) -> dict:
     """Run incremental scan on PR changed files only."""
     init_db()
-    changed = _get_pr_changed_files(repo_path, pr_number)
+    changed = _get_pr_changed_files(repo_path, pr_number, base_ref)
     if not changed:
         return {"scan_id": "none", "summary": {"scanned_units": 0}}
 
@@ -197,31 +338,33 @@ def run_pr_scan(repo_path: str, repo_name: str,
     changed = [f for f in changed
                if Path(f).suffix in supported]
 
-    units = []
-    for f in changed:
-        units.extend(parse_file(f, repo_path))
+    units, file_hashes = _cached_extract(repo_path, changed)
 
     if not units:
         return {"scan_id": "none", "summary": {"scanned_units": 0}}
 
     # Cache lookup
-    cached_ev, cached_scores, hit_units, miss_units = _cached_scan(
-        repo_path, units)
+    rules = load_rules(RULES_PATH)
+    cached_ev, cached_scores, cached_rm, hit_units, miss_units, unit_keys = (
+        _cached_scan(repo_path, units, rules, file_hashes))
     if miss_units:
         new_ev = collect_all_evidence(repo_path, miss_units)
         new_scores = score_all(miss_units, new_ev)
-        _store_cache(repo_path, miss_units, new_ev, new_scores)
+        new_rm = match_all_rules(miss_units, rules)
     else:
         new_ev = {}
         new_scores = {}
-
-    ev_map = {**cached_ev, **new_ev}
-    scores = {**cached_scores, **new_scores}
+        new_rm = {}
+
+    # hit/miss 유닛은 서로 겹치지 않으므로 캐시 dict에 그대로 병합
+    cached_ev.update(new_ev)
+    cached_scores.update(new_scores)
+    cached_rm.update(new_rm)
+    ev_map = cached_ev
+    scores = cached_scores
+    rm_map = cached_rm
     clusters = find_clusters(units)
 
-    rules = load_rules(RULES_PATH)
-    rm_map = {u.id: match_rules(u, rules) for u in units}
-
     branch = ""
     try:
         r = subprocess.run(
@@ -243,12 +386,50 @@ def run_pr_scan(repo_path: str, repo_name: str,
         rule_matches_map=rm_map,
     )
 
-    _store_report(report)
+    with scan_transaction() as conn:
+        _store_cache(miss_units, new_ev, new_scores, new_rm, unit_keys,
+                     conn=conn)
+        _store_report(report, conn=conn)
+    _optimize_db()
     return report
 
 
-def _get_pr_changed_files(repo_path: str, pr_number: int) -> list[str]:
-    """Get list of changed files from PR via gh CLI."""
+def _get_pr_base_ref(repo_path: str, pr_number: int) -> str | None:
+    """PR base branch name via gh (small metadata call, no diff)."""
+    try:
+        result = subprocess.run(
+            ["gh", "pr", "view", str(pr_number),
+             "--json", "baseRefName", "-q", ".baseRefName"],
+            cwd=repo_path, capture_output=True, text=True,
+            check=True, timeout=30,
+        )
+        return result.stdout.strip() or None
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+            FileNotFoundError):
+        return None
+
+
+def _get_pr_changed_files(repo_path: str, pr_number: int,
+                          base_ref: str | None = None) -> list[str]:
+    """Get list of changed files from PR.
+
+    Diffs locally against ``origin/<base>`` when the base branch is known
+    and fetched; falls back to ``gh pr diff`` otherwise.
+    """
+    base = base_ref or _get_pr_base_ref(repo_path, pr_number)
+    if base:
+        try:
+            result = subprocess.run(
+                ["git", "diff", "--name-only", "-z",
+                 f"origin/{base}...HEAD"],
+                cwd=repo_path, capture_output=True,
+                check=True, timeout=30,
+            )
+            return [f for f in result.stdout.decode(
+                "utf-8", errors="surrogateescape").split("\0") if f]
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError):
+            pass
     try:
         result = subprocess.run(
             ["gh", "pr", "diff", str(pr_number), "--name-only"],
@@ -261,26 +442,36 @@ def _get_pr_changed_files(repo_path: str, pr_number: int) -> list[str]:
         return []
 
 
-def _store_report(report: dict):
-    """Store report in SQLite."""
-    conn = get_conn()
-    try:
-        conn.execute(
-            "INSERT OR REPLACE INTO scans "
-            "(scan_id, repo_name, commit_sha, branch, scan_type, report_json) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (
-                report["scan_id"],
-                report["repo"]["name"],
-                report["repo"]["commit"],
-                report["repo"].get("branch", ""),
-                report["scan_type"],
-                json.dumps(report, ensure_ascii=False),
-            ),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+_INSERT_SCAN_SQL = (
+    "INSERT OR REPLACE INTO scans "
+    "(scan_id, repo_name, commit_sha, branch, scan_type, report_json) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def _store_report(report: dict,
+                  conn: sqlite3.Connection | None = None):
+    """Store report in SQLite (inside ``conn``'s transaction if given)."""
+    if conn is None:
+        with get_conn() as own:
+            _store_report(report, own)
+        return
+    conn.execute(
+        _INSERT_SCAN_SQL,
+        (
+            report["scan_id"],
+            report["repo"]["name"],
+            report["repo"]["commit"],
+            report["repo"].get("branch", ""),
+            report["scan_type"],
+            pack(report),
+        ),
+    )
+
+
+def _optimize_db():
+    """Refresh SQLite planner statistics once per scan."""
+    get_conn().execute("PRAGMA optimize")
 
 
 def post_pr_comment(repo_full_name: str, pr_number: int,
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import json
+import heapq
 import uuid
 from datetime import datetime
 from pathlib import Path
 
 from jinja2 import Template
 
+from engine._json import dumps_pretty
 from engine.extract import Unit
 from engine.evidence import Evidence
 from engine.scores import UnitScores
@@ -20,35 +21,38 @@ def _generate_why(unit: Unit, score: UnitScores,
                   evidence: Evidence) -> list[str]:
     """Generate human-readable 'why' reasons for a hotspot."""
     reasons = []
-    if unit.nesting_depth >= 4:
-        reasons.append(f"deep nesting ({unit.nesting_depth})")
-    if unit.branch_count >= 8:
-        reasons.append(f"branch count high ({unit.branch_count})")
-    if unit.boolean_complexity >= 4:
-        reasons.append(f"boolean complexity ({unit.boolean_complexity})")
+    nd = unit.nesting_depth
+    bc = unit.branch_count
+    bcx = unit.boolean_complexity
+    rse = unit.render_side_effects
+    ia = unit.identifier_ambiguity
+    da = evidence.distinct_authors
+    if nd >= 4:
+        reasons.append(f"deep nesting ({nd})")
+    if bc >= 8:
+        reasons.append(f"branch count high ({bc})")
+    if bcx >= 4:
+        reasons.append(f"boolean complexity ({bcx})")
     if unit.try_catch_count == 0 and unit.loc > 20:
         reasons.append("no error handling in long function")
-    if unit.render_side_effects > 0:
-        reasons.append(f"render side-effects ({unit.render_side_effects})")
-    if evidence.distinct_authors <= 1:
-        authors_msg = f"low human touch ({evidence.distinct_authors} author"
+    if rse > 0:
+        reasons.append(f"render side-effects ({rse})")
+    if da <= 1:
+        authors_msg = f"low human touch ({da} author"
         if not evidence.touched_after_creation:
             authors_msg += ", never revised"
         authors_msg += ")"
         reasons.append(authors_msg)
-    if unit.identifier_ambiguity > 0.3:
-        reasons.append(
-            f"ambiguous identifiers ({unit.identifier_ambiguity:.0%})")
+    if ia > 0.3:
+        reasons.append(f"ambiguous identifiers ({ia:.0%})")
     return reasons
 
 
 def _generate_actions(unit: Unit, rule_matches: list[RuleMatch],
                       cluster_id: str | None) -> list[str]:
     """Generate actionable recommendations."""
-    actions = []
     # From rule matches
-    for rm in rule_matches[:3]:
-        actions.append(rm.action)
+    actions = [rm.action for rm in rule_matches[:3]]
     # Generic actions based on scores
     if unit.nesting_depth >= 5 and not any("분리" in a for a in actions):
         actions.append("함수 분리 (early return 패턴 적용)")
@@ -95,36 +99,37 @@ def build_report(
     """Build the full JSON report."""
     scan_id = str(uuid.uuid4())[:8]
 
-    # Summary
-    shadow_count = sum(1 for s in scores_map.values() if s.shadow)
+    # Summary (scores / clusters 각각 한 번씩만 순회)
+    shadow_count = 0
+    cog_total = 0.0
+    for s in scores_map.values():
+        shadow_count += s.shadow
+        cog_total += s.cognitive_load
     total = len(units)
     density = shadow_count / total if total else 0
-    avg_cog = (sum(s.cognitive_load for s in scores_map.values()) / total
-               if total else 0)
-    unique_clusters = len(clusters)
-    total_in_clusters = sum(len(c.members) for c in clusters)
-    redundancy = total_in_clusters / total if total else 0
-    runway = calc_runway(units, scores_map)
+    avg_cog = cog_total / total if total else 0
 
     # Cluster lookup
     unit_cluster = {}
+    total_in_clusters = 0
     for c in clusters:
+        total_in_clusters += len(c.members)
         for mid in c.members:
             unit_cluster[mid] = c.id
+    redundancy = total_in_clusters / total if total else 0
+    runway = calc_runway(units, scores_map)
 
     # Assign cluster IDs to scores
     for uid, s in scores_map.items():
         s.redundancy_cluster_id = unit_cluster.get(uid)
 
     # Hotspots: top 10 by cognitive_load (shadow first)
-    ranked = sorted(
-        units,
-        key=lambda u: (
-            -int(scores_map[u.id].shadow),
-            -scores_map[u.id].cognitive_load,
-        ),
-    )
-    top_hotspots = ranked[:10]
+    def _rank(u: Unit) -> tuple[int, float]:
+        s = scores_map[u.id]
+        return -int(s.shadow), -s.cognitive_load
+
+    # nsmallest == sorted(...)[:10] (동률 시 원래 순서 유지), O(N log 10)
+    top_hotspots = heapq.nsmallest(10, units, key=_rank)
 
     hotspots = []
     for u in top_hotspots:
@@ -148,17 +153,22 @@ def build_report(
             "actions": _generate_actions(u, rm, cid),
         })
 
-    cluster_list = [
-        {
+    # id → Unit (중복 id면 첫 번째 유닛 우선)
+    unit_by_id: dict[str, Unit] = {}
+    for u in units:
+        unit_by_id.setdefault(u.id, u)
+
+    cluster_list = []
+    for c in clusters:
+        members = []
+        for mid in c.members:
+            u = unit_by_id.get(mid)
+            members.append(f"{u.file_path}#{u.name}" if u else "?#?")
+        cluster_list.append({
             "id": c.id,
-            "members": [
-                f"{next((u.file_path for u in units if u.id == mid), '?')}#{next((u.name for u in units if u.id == mid), '?')}"
-                for mid in c.members
-            ],
+            "members": members,
             "suggestion": c.suggestion,
-        }
-        for c in clusters
-    ]
+        })
 
     return {
         "scan_id": scan_id,
@@ -182,8 +192,7 @@ def build_report(
 def save_json(report: dict, output_path: str | Path):
     path = Path(output_path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+    path.write_bytes(dumps_pretty(report))
 
 
 PR_COMMENT_TEMPLATE = """\
@@ -213,6 +222,8 @@ PR_COMMENT_TEMPLATE = """\
 ---
 *GhostCode Auditor v0.1*
 """
+# 렌더링마다 lex/compile 하지 않도록 import 시 1회 컴파일
+_PR_COMMENT_TMPL = Template(PR_COMMENT_TEMPLATE)
 
 
 def render_pr_comment(report: dict) -> str:
@@ -221,8 +232,7 @@ def render_pr_comment(report: dict) -> str:
         if h["scores"]["review_evidence"] < 30
         and h["scores"]["cognitive_load"] > 70
     )
-    tmpl = Template(PR_COMMENT_TEMPLATE)
-    return tmpl.render(
+    return _PR_COMMENT_TMPL.render(
         **report,
         shadow_count=shadow_count,
     )
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import functools
 import re
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # libyaml 없이 빌드된 PyYAML
+    from yaml import SafeLoader as _SafeLoader
+
+try:
+    import hyperscan
+except ImportError:  # 선택 의존성: 없으면 re로 폴백
+    hyperscan = None
+
 from engine.extract import Unit
 
 
@@ -28,134 +41,271 @@ class Rule:
 
 
 def load_rules(yaml_path: str | Path) -> list[Rule]:
-    """Load rules from YAML file."""
+    """Load rules from YAML file.
+
+    Parsed once per file version: the cache key includes mtime/size, so
+    edits to the rule file are picked up on the next call.
+    """
     path = Path(yaml_path)
+    st = path.stat()
+    return list(_load_rules_cached(
+        str(path.resolve()), st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_rules_cached(path: str, mtime_ns: int,
+                       size: int) -> tuple[Rule, ...]:
     with open(path) as f:
-        data = yaml.safe_load(f)
-    rules = []
-    for r in data.get("rules", []):
-        rules.append(Rule(
+        data = yaml.load(f, Loader=_SafeLoader)
+    return tuple(
+        Rule(
             id=r["id"],
             name=r["name"],
             when=r["when"],
             severity=r["severity"],
             action=r["action"],
-        ))
-    return rules
+        )
+        for r in data.get("rules", [])
+    )
+
+
+# === 규칙별 정규식 (import 시 1회 컴파일) ===
+
+_RE_USEEFFECT_ARROW = re.compile(r"useEffect\(\s*\(\)\s*=>")
+_RE_EMPTY_DEPS = re.compile(r",\s*\[\s*\]\s*\)")
+_RE_SETSTATE_IN_LOOP = [
+    re.compile(r"for\s*\(.*\)\s*\{[^}]*set[A-Z]", re.DOTALL),
+    re.compile(r"\.forEach\([^)]*set[A-Z]", re.DOTALL),
+    re.compile(r"\.map\([^)]*set[A-Z]", re.DOTALL),
+]
+_RE_DERIVED_STATE = re.compile(r"useState\(\s*props\.")
+_RE_PROP_SPREAD = re.compile(r"\{\.\.\.(\w+)\}")
+_RE_ANY_TYPE = re.compile(r":\s*any\b")
+_RE_API_CALL = re.compile(r"(fetch|axios|\.get|\.post|\.put|\.delete)\s*\(")
+_RE_EMPTY_CATCH = re.compile(r"catch\s*\([^)]*\)\s*\{\s*\}")
+_RE_CATCH_CONSOLE = re.compile(r"catch\s*\([^)]*\)\s*\{\s*console\.log")
+# 빈 catch / console.log catch를 한 번의 스캔으로 (group 1 = 빈 catch)
+_RE_CATCH_BODY = re.compile(r"catch\s*\([^)]*\)\s*\{\s*(?:(\})|console\.log)")
+_RE_DEEP_ACCESS = re.compile(r"\w+\.\w+\.\w+\.\w+")
+_RE_OPTIONAL_CHAIN = re.compile(r"\?\.")
+_RE_INLINE_HANDLER = re.compile(r"on\w+=\{\s*\(\s*\w*\s*\)\s*=>")
+_RE_STRING_LITERAL = re.compile(r"['\"]([^'\"]{2,})['\"]")
+_RE_COMMENT = re.compile(r"//.*|/\*.*?\*/", re.DOTALL)
+
+# 매치 존재 여부만 보는 패턴 (개수를 세는 패턴은 re 유지)
+_PRESENCE_PATTERNS: dict[str, re.Pattern] = {
+    "useeffect_arrow": _RE_USEEFFECT_ARROW,
+    "empty_deps": _RE_EMPTY_DEPS,
+    "setstate_for": _RE_SETSTATE_IN_LOOP[0],
+    "setstate_foreach": _RE_SETSTATE_IN_LOOP[1],
+    "setstate_map": _RE_SETSTATE_IN_LOOP[2],
+    "derived_state": _RE_DERIVED_STATE,
+    "api_call": _RE_API_CALL,
+    "empty_catch": _RE_EMPTY_CATCH,
+    "catch_console": _RE_CATCH_CONSOLE,
+    "deep_access": _RE_DEEP_ACCESS,
+    "optional_chain": _RE_OPTIONAL_CHAIN,
+}
+_SETSTATE_NAMES = ("setstate_for", "setstate_foreach", "setstate_map")
+# 패턴 매치에 반드시 필요한 리터럴: 없으면 정규식 실행 생략 (re 폴백 전용)
+_PRESENCE_LITERALS = {
+    "useeffect_arrow": "useEffect(",
+    "setstate_for": "for",
+    "setstate_foreach": ".forEach(",
+    "setstate_map": ".map(",
+    "derived_state": "props.",
+    "empty_catch": "catch",
+    "catch_console": "console.log",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _presence_db():
+    """Compile all presence patterns into one Hyperscan database.
+
+    Compiled on first scan rather than at import (compile takes ~0.5s).
+    """
+    if hyperscan is None:
+        return None
+    names = list(_PRESENCE_PATTERNS)
+    base = (hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 |
+            hyperscan.HS_FLAG_UCP)
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[_PRESENCE_PATTERNS[n].pattern.encode() for n in names],
+            ids=list(range(len(names))),
+            flags=[base | (hyperscan.HS_FLAG_DOTALL
+                           if _PRESENCE_PATTERNS[n].flags & re.DOTALL else 0)
+                   for n in names],
+        )
+    except hyperscan.HyperscanError:
+        return None
+    return names, db
+
+
+# scratch 공간은 스레드 간 공유 불가 → 스레드별로 1개
+_HS_LOCAL = threading.local()
+
+
+def _scan_presence(source: str) -> frozenset[str] | None:
+    """Names of presence patterns found in source, in one pass.
+
+    Returns None when Hyperscan is unavailable; checkers then fall back to
+    per-pattern ``re`` searches.
+    """
+    compiled = _presence_db()
+    if compiled is None:
+        return None
+    names, db = compiled
+    scratch = getattr(_HS_LOCAL, "scratch", None)
+    if scratch is None:
+        scratch = _HS_LOCAL.scratch = hyperscan.Scratch(db)
+    hits: set[str] = set()
+
+    def on_match(pid, start, end, flags, context):
+        hits.add(names[pid])
+
+    db.scan(source.encode("utf-8", errors="replace"),
+            match_event_handler=on_match, scratch=scratch)
+    return frozenset(hits)
+
+
+def _has(hits: frozenset[str] | None, name: str, source: str) -> bool:
+    if hits is not None:
+        return name in hits
+    if name == "optional_chain":
+        return "?." in source
+    literal = _PRESENCE_LITERALS.get(name)
+    if literal is not None and literal not in source:
+        return False
+    return _PRESENCE_PATTERNS[name].search(source) is not None
 
 
 # === 규칙별 매칭 함수 ===
 
-def _check_render_side_effect(unit: Unit) -> str | None:
+def _check_render_side_effect(unit: Unit, hits: frozenset[str] | None) -> str | None:
     if unit.kind == "component" and unit.render_side_effects > 0:
         return f"render body에서 side-effect {unit.render_side_effects}건 감지"
     return None
 
 
-def _check_useeffect_deps(unit: Unit) -> str | None:
+def _check_useeffect_deps(unit: Unit, hits: frozenset[str] | None) -> str | None:
     if "useEffect" not in unit.hook_calls:
         return None
     # heuristic: useEffect with empty deps but referencing outer vars
     # 간단히: source에서 useEffect(()=>{...}, []) 패턴 감지
-    if re.search(r"useEffect\(\s*\(\)\s*=>", unit.source):
-        if re.search(r",\s*\[\s*\]\s*\)", unit.source):
+    if _has(hits, "useeffect_arrow", unit.source):
+        if _has(hits, "empty_deps", unit.source):
             return "useEffect 빈 deps + 외부 변수 참조 가능성"
     return None
 
 
-def _check_setstate_in_loop(unit: Unit) -> str | None:
-    patterns = [
-        r"for\s*\(.*\)\s*\{[^}]*set[A-Z]",
-        r"\.forEach\([^)]*set[A-Z]",
-        r"\.map\([^)]*set[A-Z]",
-    ]
-    for p in patterns:
-        if re.search(p, unit.source, re.DOTALL):
+def _check_setstate_in_loop(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    for name in _SETSTATE_NAMES:
+        if _has(hits, name, unit.source):
             return "loop 내부에서 setState 호출 감지"
     return None
 
 
-def _check_derived_state(unit: Unit) -> str | None:
-    if re.search(r"useState\(\s*props\.", unit.source):
+def _check_derived_state(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    if _has(hits, "derived_state", unit.source):
         return "props를 useState 초기값으로 사용 (derived state)"
     return None
 
 
-def _check_prop_drilling(unit: Unit) -> str | None:
+def _check_prop_drilling(unit: Unit, hits: frozenset[str] | None) -> str | None:
     # 간단 heuristic: 파라미터 전개 패턴이 많으면
-    spread_count = len(re.findall(r"\{\.\.\.(\w+)\}", unit.source))
+    if "{..." not in unit.source:
+        return None
+    spread_count = len(_RE_PROP_SPREAD.findall(unit.source))
     if spread_count >= 3:
         return f"prop spreading {spread_count}회 감지 (drilling 의심)"
     return None
 
 
-def _check_any_abuse(unit: Unit) -> str | None:
-    matches = re.findall(r":\s*any\b", unit.source)
+def _check_any_abuse(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    if "any" not in unit.source:
+        return None
+    matches = _RE_ANY_TYPE.findall(unit.source)
     if len(matches) > 3:
         return f"'any' 타입 {len(matches)}건 사용"
     return None
 
 
-def _check_api_no_trycatch(unit: Unit) -> str | None:
-    has_api = bool(re.search(
-        r"(fetch|axios|\.get|\.post|\.put|\.delete)\s*\(", unit.source))
+def _check_api_no_trycatch(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    has_api = _has(hits, "api_call", unit.source)
     if has_api and unit.try_catch_count == 0:
         return "API 호출 존재하지만 try/catch 없음"
     return None
 
 
-def _check_empty_catch(unit: Unit) -> str | None:
-    if re.search(r"catch\s*\([^)]*\)\s*\{\s*\}", unit.source):
+def _check_empty_catch(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    if hits is not None:
+        if "empty_catch" in hits:
+            return "빈 catch 블록 감지"
+        if "catch_console" in hits:
+            return "catch에서 console.log만 사용"
+        return None
+    if "catch" not in unit.source:
+        return None
+    m = _RE_CATCH_BODY.search(unit.source)
+    if m is None:
+        return None
+    # 빈 catch가 우선: console.log catch 뒤쪽에 빈 catch가 있을 수 있음
+    if m.group(1) or _RE_EMPTY_CATCH.search(unit.source, m.end()):
         return "빈 catch 블록 감지"
-    if re.search(
-            r"catch\s*\([^)]*\)\s*\{\s*console\.log", unit.source):
-        return "catch에서 console.log만 사용"
-    return None
+    return "catch에서 console.log만 사용"
 
 
-def _check_null_unsafe(unit: Unit) -> str | None:
+def _check_null_unsafe(unit: Unit, hits: frozenset[str] | None) -> str | None:
     # 3+ deep property access without ?.
-    if re.search(r"\w+\.\w+\.\w+\.\w+", unit.source):
-        if not re.search(r"\?\.", unit.source):
+    if _has(hits, "deep_access", unit.source):
+        if not _has(hits, "optional_chain", unit.source):
             return "깊은 프로퍼티 접근에 optional chaining 없음"
     return None
 
 
-def _check_boolean_overload(unit: Unit) -> str | None:
+def _check_boolean_overload(unit: Unit, hits: frozenset[str] | None) -> str | None:
     if unit.boolean_complexity >= 6:
         return f"boolean 연산자 {unit.boolean_complexity}개 (>=6)"
     return None
 
 
-def _check_deep_nesting(unit: Unit) -> str | None:
+def _check_deep_nesting(unit: Unit, hits: frozenset[str] | None) -> str | None:
     if unit.nesting_depth >= 5:
         return f"중첩 깊이 {unit.nesting_depth} (>=5)"
     return None
 
 
-def _check_inline_handler(unit: Unit) -> str | None:
+def _check_inline_handler(unit: Unit, hits: frozenset[str] | None) -> str | None:
     if unit.kind != "component":
         return None
-    inline = len(re.findall(
-        r"on\w+=\{\s*\(\s*\w*\s*\)\s*=>", unit.source))
+    if "=>" not in unit.source:
+        return None
+    inline = len(_RE_INLINE_HANDLER.findall(unit.source))
     if inline >= 3:
         return f"inline handler {inline}건 (useCallback 고려)"
     return None
 
 
-def _check_magic_strings(unit: Unit) -> str | None:
-    strings = re.findall(r"['\"]([^'\"]{2,})['\"]", unit.source)
-    from collections import Counter
-    counts = Counter(strings)
-    repeated = {s: c for s, c in counts.items() if c >= 3}
-    if repeated:
-        top = max(repeated, key=repeated.get)
-        return f"문자열 '{top}' {repeated[top]}회 반복"
+def _check_magic_strings(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    counts: dict[str, int] = {}
+    for s in _RE_STRING_LITERAL.findall(unit.source):
+        counts[s] = counts.get(s, 0) + 1
+    if not counts:
+        return None
+    # 동률이면 먼저 등장한 문자열 (dict 삽입 순서)
+    top = max(counts, key=counts.get)
+    if counts[top] >= 3:
+        return f"문자열 '{top}' {counts[top]}회 반복"
     return None
 
 
-def _check_comment_over_naming(unit: Unit) -> str | None:
-    comments = len(re.findall(r"//.*|/\*.*?\*/", unit.source, re.DOTALL))
+def _check_comment_over_naming(unit: Unit, hits: frozenset[str] | None) -> str | None:
+    if unit.identifier_ambiguity <= 0.5 or "/" not in unit.source:
+        return None  # 모호도 조건 미달 or 주석 없음 (비율 0)
+    comments = len(_RE_COMMENT.findall(unit.source))
     code_lines = max(1, unit.loc - comments)
     ratio = comments / code_lines
     if ratio > 0.4 and unit.identifier_ambiguity > 0.5:
@@ -185,12 +335,32 @@ RULE_CHECKERS = {
 
 def match_rules(unit: Unit, rules: list[Rule]) -> list[RuleMatch]:
     """Apply all rules to a unit, return matches."""
-    matches = []
+    return _match_resolved(unit, _resolve_checkers(rules))
+
+
+def match_all_rules(units: list[Unit],
+                    rules: list[Rule]) -> dict[str, list[RuleMatch]]:
+    """Apply all rules to every unit. Returns {unit_id: matches}."""
+    resolved = _resolve_checkers(rules)
+    return {u.id: _match_resolved(u, resolved) for u in units}
+
+
+def _resolve_checkers(rules: list[Rule]) -> list[tuple[Rule, Callable]]:
+    """(rule, checker) pairs for rules that have a checker."""
+    resolved = []
     for rule in rules:
         checker = RULE_CHECKERS.get(rule.id)
-        if checker is None:
-            continue
-        detail = checker(unit)
+        if checker is not None:
+            resolved.append((rule, checker))
+    return resolved
+
+
+def _match_resolved(unit: Unit,
+                    resolved: list[tuple[Rule, Callable]]) -> list[RuleMatch]:
+    matches = []
+    hits = _scan_presence(unit.source)
+    for rule, checker in resolved:
+        detail = checker(unit, hits)
         if detail:
             matches.append(RuleMatch(
                 rule_id=rule.id,
@@ -38,53 +38,64 @@ class UnitScores:
 def calc_cognitive_load(unit: Unit) -> float:
     """Calculate cognitive load score (0~100) with React adjustments."""
 
+    # min() 호출 대신 조건식 (유닛당 수 회 → score_all 핫패스)
+    nd = unit.nesting_depth
+    bc = unit.branch_count
+    bcx = unit.boolean_complexity
+    cbd = unit.callback_depth
+
     # nesting: 0~6 → 0~90 (capped)
-    nesting_score = min(unit.nesting_depth, 6) * W_NESTING
+    nesting_score = (nd if nd < 6 else 6) * W_NESTING
 
     # branch: 0~10 → 0~100 (capped)
-    branch_score = min(unit.branch_count, 10) * W_BRANCH
+    branch_score = (bc if bc < 10 else 10) * W_BRANCH
 
     # boolean complexity: 0~8 → 0~64
-    bool_score = min(unit.boolean_complexity, 8) * W_BOOLEAN
+    bool_score = (bcx if bcx < 8 else 8) * W_BOOLEAN
 
     # callback depth (estimated from nested arrow functions)
-    cb_score = min(unit.callback_depth, 5) * W_CALLBACK
+    cb_score = (cbd if cbd < 5 else 5) * W_CALLBACK
 
     # identifier ambiguity (0.0~1.0 → 0~100)
     ambig_score = unit.identifier_ambiguity * 100 * (W_AMBIGUITY / 100)
 
     # context switches (not easily computed from AST alone, placeholder)
-    ctx_score = min(unit.context_switches, 5) * W_CONTEXT
+    cs = unit.context_switches
+    ctx_score = (cs if cs < 5 else 5) * W_CONTEXT
+
+    kind = unit.kind
 
     # exception irregularity
     exc_score = 0
     if unit.try_catch_count > 0:
         exc_score = W_EXCEPTION
-    elif unit.kind == "function" and unit.loc > 20:
+    elif kind == "function" and unit.loc > 20:
         # long function without try/catch may be risky
         exc_score = W_EXCEPTION // 2
 
     # side effects
-    se_score = min(unit.render_side_effects, 3) * W_SIDE_EFFECT
+    rse = unit.render_side_effects
+    se_score = (rse if rse < 3 else 3) * W_SIDE_EFFECT
 
     raw = (nesting_score + branch_score + bool_score + cb_score +
            ambig_score + ctx_score + exc_score + se_score)
 
     # React 보정
     react_adj = 0
-    if unit.kind in ("component", "hook"):
-        has_useeffect = "useEffect" in unit.hook_calls
-        if has_useeffect and not unit.has_cleanup:
-            react_adj += REACT_USEEFFECT_UNSTABLE_PENALTY
+    if kind == "component" or kind == "hook":
         if unit.has_cleanup:
             react_adj += REACT_CLEANUP_BONUS
-        if unit.render_side_effects > 0 and unit.kind == "component":
+        elif "useEffect" in unit.hook_calls:
+            react_adj += REACT_USEEFFECT_UNSTABLE_PENALTY
+        if rse > 0 and kind == "component":
             react_adj += REACT_RENDER_SIDE_EFFECT_PENALTY
 
     score = raw + react_adj
 
-    # 정규화: 0~100
-    return max(0.0, min(100.0, score))
+    # 정규화: 0~100 (min/max 호출 없이, 경계값 float 유지)
+    if score >= 100.0:
+        return 100.0
+    return score if score > 0.0 else 0.0
 
 
 def calc_fragility(unit: Unit, cognitive_load: float,
@@ -119,10 +130,8 @@ def score_unit(unit: Unit, evidence: Evidence) -> UnitScores:
 def score_all(units: list[Unit],
               evidence_map: dict[str, Evidence]) -> dict[str, UnitScores]:
     """Score all units. Returns {unit_id: UnitScores}."""
-    result = {}
-    for unit in units:
-        ev = evidence_map.get(unit.id)
-        if ev is None:
-            ev = Evidence(unit_id=unit.id)
-        result[unit.id] = score_unit(unit, ev)
-    return result
+    # evidence가 없으면 기본값(점수 0) 공유 — score_unit은 점수만 읽음
+    no_evidence = Evidence(unit_id="")
+    get = evidence_map.get
+    return {unit.id: score_unit(unit, get(unit.id) or no_evidence)
+            for unit in units}
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-import hashlib
+import functools
+import math
+import os
 import re
 from dataclasses import dataclass, field
 
+import xxhash
+
 from engine.extract import Unit
 
 # 토큰 정규화: 변수명 → _VAR, 문자열 → _STR, 숫자 → _NUM
@@ -13,15 +17,24 @@ _TOKEN_RE = re.compile(
     r'|\b[a-zA-Z_$]\w*\b'          # identifiers
     r'|[{}()\[\];,.:?!<>=+\-*/&|^~%@]'  # operators/punctuation
 )
+# ASCII 전용 소스는 유니코드 클래스 테이블 없이 매칭 (결과는 동일)
+_TOKEN_RE_ASCII = re.compile(_TOKEN_RE.pattern, re.ASCII)
 
-_KEYWORDS = {
+_KEYWORDS = frozenset({
     "const", "let", "var", "function", "return", "if", "else",
     "for", "while", "do", "switch", "case", "break", "continue",
     "try", "catch", "finally", "throw", "new", "delete", "typeof",
     "instanceof", "in", "of", "class", "extends", "super", "this",
     "import", "export", "default", "from", "async", "await", "yield",
     "true", "false", "null", "undefined", "void",
-}
+})
+
+# 정규화 토큰은 닫힌 집합 → 클러스터링 내부에서는 작은 정수 id로 처리
+_OPERATORS = "{}()[];,.:?!<>=+-*/&|^~%@"
+_TOKEN_VOCAB = ("_STR", "_NUM", "_VAR", "_", "$",
+                *sorted(_KEYWORDS), *_OPERATORS)
+_TOKEN_ID = {tok: i for i, tok in enumerate(_TOKEN_VOCAB)}
+_TOKEN_BITS = (len(_TOKEN_VOCAB) - 1).bit_length()
 
 SHINGLE_SIZE = 4
 SIMILARITY_THRESHOLD_UTIL = 0.7
@@ -35,29 +48,76 @@ class Cluster:
     suggestion: str = ""
 
 
+def _normalize_token(tok: str) -> str:
+    if tok.startswith(("'", '"', "`")):
+        return "_STR"
+    if tok[0].isdigit():
+        return "_NUM"
+    if len(tok) == 1:
+        # 연산자/구두점 (키워드는 모두 2글자 이상)
+        return "_VAR" if tok.isalpha() else tok
+    if tok in _KEYWORDS:
+        return tok
+    return "_VAR"
+
+
+def _raw_tokens(source: str) -> list[str]:
+    if source.isascii():
+        return _TOKEN_RE_ASCII.findall(source)
+    return _TOKEN_RE.findall(source)
+
+
 def tokenize(source: str) -> list[str]:
     """Normalize source into token sequence."""
-    tokens = []
-    for match in _TOKEN_RE.finditer(source):
-        tok = match.group()
-        if tok.startswith(("'", '"', "`")):
-            tokens.append("_STR")
-        elif tok[0].isdigit():
-            tokens.append("_NUM")
-        elif tok in _KEYWORDS:
-            tokens.append(tok)
-        elif len(tok) == 1 and not tok.isalpha():
-            tokens.append(tok)
-        else:
-            tokens.append("_VAR")
-    return tokens
+    raw = _raw_tokens(source)
+    # 같은 토큰이 반복되므로 고유 토큰만 분류 후 매핑
+    norm = {tok: _normalize_token(tok) for tok in set(raw)}
+    return list(map(norm.__getitem__, raw))
+
+
+def _token_ids(source: str) -> list[int]:
+    """Same sequence as tokenize(), as ids into _TOKEN_VOCAB."""
+    raw = _raw_tokens(source)
+    ids = {tok: _TOKEN_ID[_normalize_token(tok)] for tok in set(raw)}
+    return list(map(ids.__getitem__, raw))
+
+
+def _id_shingles(ids: list[int], n: int = SHINGLE_SIZE) -> set[int]:
+    """n-gram shingles over token ids, packed into ints (len(ids) >= n).
+
+    Rolling fingerprint: each step shifts in one id of _TOKEN_BITS bits
+    and masks off the oldest. The packing is exact (no collisions), so
+    the shingles map one-to-one onto shingles(tokenize(...)) and Jaccard
+    is unchanged.
+    """
+    mask = (1 << (_TOKEN_BITS * n)) - 1
+    h = 0
+    for i in ids[:n - 1]:
+        h = (h << _TOKEN_BITS) | i
+    out = set()
+    add = out.add
+    for i in ids[n - 1:]:
+        h = ((h << _TOKEN_BITS) | i) & mask
+        add(h)
+    return out
+
+
+@functools.lru_cache(maxsize=4096)
+def _source_shingles(source: str) -> frozenset[int] | None:
+    """Id shingles of a unit source; None if too short to shingle."""
+    # 같은 프로세스에서 재스캔 시 변경 없는 함수는 토큰화/shingle 생략
+    ids = _token_ids(source)
+    if len(ids) < SHINGLE_SIZE:
+        return None
+    return frozenset(_id_shingles(ids))
 
 
 def shingles(tokens: list[str], n: int = SHINGLE_SIZE) -> set[str]:
     """Generate n-gram shingles from token sequence."""
     if len(tokens) < n:
         return {" ".join(tokens)}
-    return {" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)}
+    # 윈도우를 zip으로 구성 → 위치마다 slice를 만들지 않음
+    return set(map(" ".join, zip(*(tokens[k:] for k in range(n)))))
 
 
 def jaccard(a: set, b: set) -> float:
@@ -65,27 +125,48 @@ def jaccard(a: set, b: set) -> float:
         return 1.0
     if not a or not b:
         return 0.0
-    return len(a & b) / len(a | b)
+    # |A ∪ B| = |A| + |B| - |A ∩ B| → 합집합 set을 만들지 않음
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def _prefix_len(size: int, threshold: float) -> int:
+    """Prefix length that any set with Jaccard >= threshold must share.
+
+    J(x, y) >= t implies |x & y| >= t * |x|, so with all sets sorted in
+    one global order, the first ``|x| - ceil(t * |x|) + 1`` elements of x
+    must contain a common element (prefix filtering).
+    """
+    # 부동소수 오차로 overlap을 과대평가하지 않도록 (prefix는 길어지는 쪽이 안전)
+    min_overlap = math.ceil(threshold * size - 1e-9)
+    return size - min_overlap + 1
 
 
 def find_clusters(units: list[Unit]) -> list[Cluster]:
-    """Find similar function clusters using token shingles."""
+    """Find similar function clusters using token shingles.
+
+    Candidate pairs come from an inverted index over prefix shingles, so
+    only pairs that can reach the threshold are compared (exact).
+    """
     if len(units) < 2:
         return []
 
     # Precompute shingles
-    unit_shingles: list[tuple[Unit, set[str]]] = []
+    # 프로세스 풀 미사용: 토큰화는 전체의 ~1/3이고 재스캔 시 캐시 hit,
+    # 스레드를 쓰는 서버 프로세스에서의 fork는 위험
+    unit_shingles: list[tuple[Unit, frozenset[int]]] = []
     for u in units:
-        tokens = tokenize(u.source)
-        if len(tokens) < SHINGLE_SIZE:
-            continue
-        unit_shingles.append((u, shingles(tokens)))
+        s = _source_shingles(u.source)
+        if s is not None:
+            unit_shingles.append((u, s))
 
     # Pairwise comparison → union-find clustering
     n = len(unit_shingles)
     parent = list(range(n))
+    height = [0] * n
 
     def find(x: int) -> int:
+        # path halving: 한 번의 순회로 경로를 절반씩 단축
         while parent[x] != x:
             parent[x] = parent[parent[x]]
             x = parent[x]
@@ -93,12 +174,40 @@ def find_clusters(units: list[Unit]) -> list[Cluster]:
 
     def union(x: int, y: int):
         px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
+        if px == py:
+            return
+        # union by rank: 낮은 트리를 높은 트리 아래로
+        if height[px] < height[py]:
+            px, py = py, px
+        parent[py] = px
+        if height[px] == height[py]:
+            height[px] += 1
+
+    # 전역 순서: 드문 shingle 먼저 → prefix의 inverted list가 짧음
+    df: dict[int, int] = {}
+    for _, s in unit_shingles:
+        for sh in s:
+            df[sh] = df.get(sh, 0) + 1
+    rank = {sh: r for r, sh in enumerate(
+        sorted(df, key=lambda sh: (df[sh], sh)))}
+    min_threshold = min(SIMILARITY_THRESHOLD_UTIL,
+                        SIMILARITY_THRESHOLD_COMPONENT)
 
+    index: dict[int, list[int]] = {}
     for i in range(n):
-        for j in range(i + 1, n):
-            u_i, s_i = unit_shingles[i]
+        u_i, s_i = unit_shingles[i]
+        ordered = sorted(s_i, key=rank.__getitem__)
+        candidates: set[int] = set()
+        for sh in ordered[:_prefix_len(len(ordered), min_threshold)]:
+            bucket = index.get(sh)
+            if bucket is None:
+                index[sh] = [i]
+            else:
+                candidates.update(bucket)
+                bucket.append(i)
+
+        len_i = len(s_i)
+        for j in sorted(candidates):
             u_j, s_j = unit_shingles[j]
 
             # 컴포넌트 간 유사도는 높은 임계값
@@ -107,6 +216,14 @@ def find_clusters(units: list[Unit]) -> list[Cluster]:
             threshold = (SIMILARITY_THRESHOLD_COMPONENT if both_component
                          else SIMILARITY_THRESHOLD_UTIL)
 
+            # 길이 필터: J(a, b) <= min(|a|, |b|) / max(|a|, |b|)
+            len_j = len(s_j)
+            if len_i < len_j:
+                if len_i / len_j < threshold:
+                    continue
+            elif len_j / len_i < threshold:
+                continue
+
             sim = jaccard(s_i, s_j)
             if sim >= threshold:
                 union(i, j)
@@ -123,7 +240,8 @@ def find_clusters(units: list[Unit]) -> list[Cluster]:
             continue
         member_units = [unit_shingles[i][0] for i in members]
         names = [f"{u.file_path}#{u.name}" for u in member_units]
-        cluster_id = hashlib.sha256(
+        # 보안 용도가 아닌 짧은 식별자 → 비암호 해시
+        cluster_id = xxhash.xxh3_64(
             "|".join(sorted(names)).encode()
         ).hexdigest()[:8]
 
@@ -141,13 +259,10 @@ def find_clusters(units: list[Unit]) -> list[Cluster]:
 def _suggest_common_name(units: list[Unit]) -> str:
     """Suggest a common utility name from unit names."""
     names = [u.name for u in units]
-    # Find common prefix
+    # Find common prefix (문자 단위 비교, 경로 구분자와 무관)
     if not names:
         return "sharedLogic"
-    prefix = names[0]
-    for name in names[1:]:
-        while not name.startswith(prefix) and prefix:
-            prefix = prefix[:-1]
+    prefix = os.path.commonprefix(names)
     if len(prefix) > 3:
         return f"shared{prefix[0].upper()}{prefix[1:]}"
     return "sharedLogic"
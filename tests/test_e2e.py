@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+import subprocess
 import sys
 
 import pytest
@@ -9,12 +10,17 @@ import pytest
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 
+def _git(repo, *args):
+    # shell 없이 git 직접 실행, 실패 시 즉시 에러
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
 @pytest.fixture(scope="session")
 def sample_repo(tmp_path_factory):
     """Create a temporary git repo with sample TS/TSX files."""
     repo = tmp_path_factory.mktemp("gc_e2e")
 
-    os.system(f"cd {repo} && git init && git checkout -b main")
+    _git(repo, "init", "-q", "-b", "main")
 
     src = repo / "src"
     src.mkdir()
@@ -56,10 +62,9 @@ export function formatDate(d: Date): string {
 }
 """)
 
-    os.system(
-        f"cd {repo} && git add -A && "
-        f"git commit -m 'initial commit' --author='test <test@test.com>'"
-    )
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=test", "-c", "user.email=test@test.com",
+         "commit", "-qm", "initial commit")
     return str(repo)
 
 
@@ -2,8 +2,8 @@
 from __future__ import annotations
 
 import os
+import subprocess
 import sys
-import tempfile
 import shutil
 
 import pytest
@@ -15,7 +15,10 @@ from engine.extract import (
     parse_file, Unit, _count_callback_depth,
     _max_nesting, _count_branches,
 )
-from engine.evidence import Evidence, _calc_score
+from engine.evidence import (
+    Evidence, _calc_score, _run_blame, collect_all_evidence,
+    _commits_for_span,
+)
 from engine.scores import (
     calc_cognitive_load, calc_fragility, calc_shadow,
     score_unit, UnitScores,
@@ -24,6 +27,7 @@ from engine.similarity import tokenize, shingles, jaccard, find_clusters
 from engine.rules import load_rules, match_rules, Rule
 from engine.cache import (
     get_cached, set_cached, purge_expired, make_unit_cache_key,
+    get_cached_many, set_cached_many,
 )
 from engine.db import init_db, get_conn
 from engine import db as db_module
@@ -36,13 +40,18 @@ RULES_PATH = os.path.join(
 
 # ── Fixtures ──────────────────────────────────────────────
 
+def _git(repo, *args):
+    # shell 없이 git 직접 실행, 실패 시 즉시 에러
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
 @pytest.fixture(scope="session")
 def sample_repo(tmp_path_factory):
     """Create a temporary repo with sample TS/TSX files for testing."""
     repo = tmp_path_factory.mktemp("gc_test")
 
     # Initialize as git repo so ingest/evidence can work
-    os.system(f"cd {repo} && git init && git checkout -b main")
+    _git(repo, "init", "-q", "-b", "main")
 
     src = repo / "src"
     src.mkdir()
@@ -116,76 +125,106 @@ export function complexFunc(data: any, opts: any) {
 """)
 
     # Commit the files
-    os.system(
-        f"cd {repo} && git add -A && "
-        f"git commit -m 'initial commit' --author='test <test@test.com>'"
-    )
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=test", "-c", "user.email=test@test.com",
+         "commit", "-qm", "initial commit")
 
     return str(repo)
 
 
+@pytest.fixture(scope="session")
+def app_units(sample_repo):
+    """Units of src/App.tsx, parsed once (tests must not mutate them)."""
+    return parse_file("src/App.tsx", sample_repo)
+
+
 @pytest.fixture()
 def temp_db():
-    """Use a temporary SQLite DB for cache tests."""
+    """Use a fresh in-memory SQLite DB for cache tests."""
     orig = db_module.DB_PATH
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_module.DB_PATH = type(orig)(f.name)
+    # :memory: DB는 연결마다 별개 → 테스트 스레드의 pooled 연결 하나로 유지
+    db_module.DB_PATH = ":memory:"
     init_db()
     yield
-    try:
-        os.unlink(str(db_module.DB_PATH))
-    except OSError:
-        pass
+    # 연결을 닫아야 다음 테스트가 빈 DB를 받음
+    db_module.close_all()
     db_module.DB_PATH = orig
 
 
+# ── Ingest Tests ──────────────────────────────────────────
+
+class TestIngest:
+    def test_collect_files_filters(self, tmp_path):
+        from engine.ingest import collect_files
+        (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+        (tmp_path / "node_modules" / "lib" / "x.ts").write_text("")
+        (tmp_path / "src").mkdir()
+        for name in ("a.ts", "b.tsx", "types.d.ts", "app.min.js", "c.py"):
+            (tmp_path / "src" / name).write_text("")
+        files = collect_files(str(tmp_path))
+        assert files == [os.path.join("src", "a.ts"),
+                         os.path.join("src", "b.tsx")]
+
+    def test_collect_files_skips_unreadable_dir(self, tmp_path, monkeypatch):
+        from engine import ingest
+        (tmp_path / "locked").mkdir()
+        (tmp_path / "locked" / "x.ts").write_text("")
+        (tmp_path / "a.ts").write_text("")
+        scandir = os.scandir
+
+        def guarded(path):
+            if os.path.basename(path) == "locked":
+                raise PermissionError(path)
+            return scandir(path)
+        monkeypatch.setattr(ingest.os, "scandir", guarded)
+        assert ingest.collect_files(str(tmp_path)) == ["a.ts"]
+
+    def test_collect_files_limit(self, sample_repo):
+        from engine.ingest import collect_files
+        assert len(collect_files(sample_repo, max_files=1)) == 1
+
+
 # ── Extract Tests ─────────────────────────────────────────
 
 class TestExtract:
-    def test_parse_file_finds_units(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        names = [u.name for u in units]
+    def test_parse_file_finds_units(self, app_units):
+        names = [u.name for u in app_units]
         assert "App" in names
         assert "useCustomHook" in names
         assert "formatDate" in names
 
-    def test_unit_kinds(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        kinds = {u.name: u.kind for u in units}
+    def test_unit_kinds(self, app_units):
+        kinds = {u.name: u.kind for u in app_units}
         assert kinds["App"] == "component"
         assert kinds["useCustomHook"] == "hook"
         assert kinds["formatDate"] == "function"
 
-    def test_nesting_depth(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        fd = next(u for u in units if u.name == "formatDate")
+    def test_nesting_depth(self, app_units):
+        fd = next(u for u in app_units if u.name == "formatDate")
         assert fd.nesting_depth >= 2, f"got {fd.nesting_depth}"
 
-    def test_hook_calls_detected(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        app = next(u for u in units if u.name == "App")
+    def test_hook_calls_detected(self, app_units):
+        app = next(u for u in app_units if u.name == "App")
         assert "useState" in app.hook_calls
         assert "useEffect" in app.hook_calls
 
-    def test_render_side_effects(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        app = next(u for u in units if u.name == "App")
+    def test_render_side_effects(self, app_units):
+        app = next(u for u in app_units if u.name == "App")
         assert app.render_side_effects >= 1
 
-    def test_callback_depth_nonzero(self, sample_repo):
+    def test_callback_depth_nonzero(self, app_units):
         """Verify callback_depth is computed (not stuck at 0)."""
-        units = parse_file("src/App.tsx", sample_repo)
-        app = next(u for u in units if u.name == "App")
+        app = next(u for u in app_units if u.name == "App")
         # fetch(...).then(r => ...).then(d => ...) => depth >= 1
         assert app.callback_depth >= 1, (
             f"callback_depth should be >= 1, got {app.callback_depth}")
 
     def test_callback_depth_function(self):
         """Test _count_callback_depth with nested arrow functions."""
-        from tree_sitter import Parser, Language
-        import tree_sitter_javascript
-        lang = Language(tree_sitter_javascript.language())
-        parser = Parser(lang)
+        from engine.extract import _get_parser
+        parser = _get_parser(".js")
+        # 같은 스레드에서는 언어당 Parser 하나를 재사용
+        assert _get_parser(".js") is parser
         code = (
             b"function test() {"
             b"  fetch(url, () => {"
@@ -198,14 +237,12 @@ class TestExtract:
         depth = _count_callback_depth(func)
         assert depth == 2
 
-    def test_branch_count(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        fd = next(u for u in units if u.name == "formatDate")
+    def test_branch_count(self, app_units):
+        fd = next(u for u in app_units if u.name == "formatDate")
         assert fd.branch_count >= 3
 
-    def test_loc_positive(self, sample_repo):
-        units = parse_file("src/App.tsx", sample_repo)
-        for u in units:
+    def test_loc_positive(self, app_units):
+        for u in app_units:
             assert u.loc > 0
 
     def test_empty_file_returns_empty(self, sample_repo):
@@ -213,6 +250,15 @@ class TestExtract:
         units = parse_file("nonexistent.ts", sample_repo)
         assert units == []
 
+    def test_oversized_file_skipped(self, tmp_path):
+        from engine.extract import MAX_FILE_BYTES
+        line = "export function big() { return 1; }\n"
+        (tmp_path / "big.ts").write_text(
+            line * (MAX_FILE_BYTES // len(line) + 1))
+        (tmp_path / "small.ts").write_text(line)
+        assert parse_file("big.ts", str(tmp_path)) == []
+        assert len(parse_file("small.ts", str(tmp_path))) == 1
+
     def test_deep_nesting_detected(self, sample_repo):
         units = parse_file("src/utils.ts", sample_repo)
         cf = next(u for u in units if u.name == "complexFunc")
@@ -315,6 +361,53 @@ class TestEvidence:
     def test_score_capped_at_100(self):
         assert _calc_score(10, True, 100, True) <= 100
 
+    def test_blame_multiple_ranges(self, sample_repo):
+        spans = [(3, 5), (20, 22)]
+        blame = _run_blame(sample_repo, "src/App.tsx", spans)
+        assert [len(blame[sp]) for sp in spans] == [3, 3]
+        assert all(e["author"] == "test" for e in blame[(20, 22)])
+
+    def test_commits_for_span_tracks_lines(self):
+        c1, c2 = {"sha": "c1"}, {"sha": "c2"}
+        # c2: inserted 2 lines after old line 2; c1: root commit
+        history = [(c2, [(2, 0, 3, 2)]), (c1, [(0, 0, 1, 10)])]
+        assert _commits_for_span(history, (6, 8)) == [c1]
+        assert _commits_for_span(history, (3, 5)) == [c2, c1]
+        assert _commits_for_span(history, (3, 4)) == [c2]
+
+    def test_collect_all_evidence_covers_units(self, sample_repo):
+        units = parse_file("src/App.tsx", sample_repo)
+        ev = collect_all_evidence(sample_repo, units)
+        assert set(ev) == {u.id for u in units}
+        assert all(e.distinct_authors == 1 for e in ev.values())
+
+    def test_commit_index_quoted_paths(self, tmp_path):
+        from engine.evidence import _build_commit_index
+        names = ["src/b b.ts", 'src/c"d.ts', "src/tab\there.ts"]
+        _git(tmp_path, "init", "-q", "-b", "main")
+        (tmp_path / "src").mkdir()
+        for rev in (1, 2):
+            for name in names:
+                (tmp_path / name).write_text(f"const v = {rev};\n")
+            _git(tmp_path, "add", "-A")
+            _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t",
+                 "commit", "-qm", f"rev {rev}")
+        index = _build_commit_index(str(tmp_path), names)
+        assert {n: len(index[n]) for n in names} == dict.fromkeys(names, 2)
+        assert len(_commits_for_span(index["src/b b.ts"], (1, 1))) == 2
+
+    def test_commit_index_none_outside_repo(self, tmp_path):
+        from engine.evidence import _build_commit_index
+        assert _build_commit_index(str(tmp_path), ["a.ts"]) is None
+
+    def test_evidence_falls_back_to_per_unit_log(self, sample_repo,
+                                                 app_units, monkeypatch):
+        from engine import evidence
+        expected = collect_all_evidence(sample_repo, app_units)
+        monkeypatch.setattr(evidence, "_build_commit_index",
+                            lambda *args: None)
+        assert collect_all_evidence(sample_repo, app_units) == expected
+
 
 # ── Similarity Tests ──────────────────────────────────────
 
@@ -344,6 +437,39 @@ class TestSimilarity:
         s = shingles(["a", "b"], 4)
         assert len(s) == 1  # single shingle for short input
 
+    def test_token_ids_mirror_tokenize(self):
+        from engine.similarity import _TOKEN_VOCAB, _token_ids, _id_shingles
+        src = ("const _ = $ => fetch(`/x/${a}`, { n: 42, s: 'y' }) ?? "
+               "items.map((i) => i * 2.5) / 3;")
+        tokens = tokenize(src)
+        ids = _token_ids(src)
+        assert [_TOKEN_VOCAB[i] for i in ids] == tokens
+        assert len(_id_shingles(ids)) == len(shingles(tokens))
+
+    def test_tokenize_non_ascii_identifier(self):
+        # ASCII 전용 패턴은 비ASCII 소스에 쓰지 않음
+        assert tokenize("const café = 1;") == [
+            "const", "_VAR", "=", "_NUM", ";"]
+
+    def test_suggest_common_name(self):
+        from engine.similarity import _suggest_common_name
+
+        def mk(name):
+            return Unit(id=name, file_path="a.ts", name=name,
+                        kind="function", span=(1, 1), loc=1)
+        assert _suggest_common_name(
+            [mk("formatDate"), mk("formatDateTime"), mk("formatDay")]
+        ) == "sharedFormatDa"
+        assert _suggest_common_name([mk("foo"), mk("bar")]) == "sharedLogic"
+
+    def test_source_shingles_memoized(self):
+        from engine.similarity import _source_shingles
+        src = "function a(x) { return x + 1; }"
+        first = _source_shingles(src)
+        assert _source_shingles(src) is first
+        assert len(first) == len(shingles(tokenize(src)))
+        assert _source_shingles("a + b") is None
+
     def test_jaccard_identical(self):
         s1 = shingles(tokenize("function a(x) { return x + 1; }"))
         s2 = shingles(tokenize("function b(y) { return y + 1; }"))
@@ -398,6 +524,46 @@ class TestSimilarity:
         clusters = find_clusters([u1, u2])
         assert len(clusters) == 0
 
+    def test_find_clusters_matches_pairwise(self):
+        """Candidate filtering must find exactly the brute-force pairs."""
+        import random
+        rng = random.Random(7)
+        vocab = ["a", "b", "1", "'s'", "+", "(", ")", "{", "}", ";",
+                 "if", "return", "for"]
+        bases = [[rng.choice(vocab) for _ in range(rng.randint(6, 40))]
+                 for _ in range(8)]
+        units = []
+        for k in range(120):
+            toks = list(rng.choice(bases))
+            for _ in range(rng.randint(0, 4)):
+                toks[rng.randrange(len(toks))] = rng.choice(vocab)
+            units.append(Unit(
+                id=f"u{k}", file_path=f"f{k}.ts", name=f"f{k}",
+                kind=rng.choice(["component", "function"]),
+                span=(1, 1), loc=1, source=" ".join(toks),
+            ))
+
+        sets = {u.id: shingles(tokenize(u.source)) for u in units}
+        parent = {u.id: u.id for u in units}
+
+        def find(x):
+            while parent[x] != x:
+                x = parent[x]
+            return x
+
+        for i, a in enumerate(units):
+            for b in units[i + 1:]:
+                t = 0.85 if a.kind == b.kind == "component" else 0.7
+                if jaccard(sets[a.id], sets[b.id]) >= t:
+                    parent[find(a.id)] = find(b.id)
+        groups = {}
+        for u in units:
+            groups.setdefault(find(u.id), set()).add(u.id)
+        expected = sorted(sorted(g) for g in groups.values() if len(g) > 1)
+
+        got = sorted(sorted(c.members) for c in find_clusters(units))
+        assert got == expected and expected
+
 
 # ── Rules Tests ───────────────────────────────────────────
 
@@ -413,6 +579,17 @@ class TestRules:
         assert r.severity in ("high", "medium", "low")
         assert r.action
 
+    def test_load_rules_reloads_on_change(self, tmp_path):
+        path = tmp_path / "rules.yaml"
+        rule = ("- {id: X-%d, name: n, when: w, severity: low, "
+                "action: a}\n")
+        path.write_text("rules:\n" + rule % 1)
+        assert [r.id for r in load_rules(path)] == ["X-1"]
+        assert load_rules(path) == load_rules(str(path))
+
+        path.write_text("rules:\n" + rule % 1 + rule % 2)
+        assert [r.id for r in load_rules(path)] == ["X-1", "X-2"]
+
     def test_react001_matches_side_effect(self, sample_repo):
         units = parse_file("src/App.tsx", sample_repo)
         rules = load_rules(RULES_PATH)
@@ -465,6 +642,43 @@ class TestRules:
         ids = [m.rule_id for m in matches]
         assert "TS-002" in ids
 
+    def test_ts003_empty_catch_wins_over_console_catch(self):
+        u = Unit(
+            id="ec", file_path="e.ts", name="swallow", kind="function",
+            span=(1, 5), loc=5,
+            source=("function swallow() { try { a(); } catch (e) { console.log(e) }"
+                    " try { b(); } catch (e) {} }"),
+        )
+        rules = load_rules(RULES_PATH)
+        ts003 = [m for m in match_rules(u, rules) if m.rule_id == "TS-003"]
+        assert ts003 and ts003[0].detail == "빈 catch 블록 감지"
+
+        u.source = "function log() { try { a(); } catch (e) { console.log(e) } }"
+        ts003 = [m for m in match_rules(u, rules) if m.rule_id == "TS-003"]
+        assert ts003 and ts003[0].detail == "catch에서 console.log만 사용"
+
+    def test_match_all_rules(self, sample_repo):
+        from engine.rules import match_all_rules
+        rules = load_rules(RULES_PATH)
+        units = parse_file("src/App.tsx", sample_repo)
+        assert match_all_rules(units, rules) == {
+            u.id: match_rules(u, rules) for u in units}
+
+    def test_presence_scan_matches_re_fallback(self, sample_repo, monkeypatch):
+        import engine.rules as rules_mod
+        rules = load_rules(RULES_PATH)
+        units = parse_file("src/App.tsx", sample_repo)
+        units.append(Unit(
+            id="mx", file_path="m.ts", name="mixed", kind="function",
+            span=(1, 5), loc=5,
+            source=("function mixed() { fetch('/x'); a.b.c.d; "
+                    "items.forEach(i => setItems(i)); "
+                    "try { x(); } catch (e) {} }"),
+        ))
+        fast = [match_rules(u, rules) for u in units]
+        monkeypatch.setattr(rules_mod, "_presence_db", lambda: None)
+        assert [match_rules(u, rules) for u in units] == fast
+
 
 # ── Cache Tests ───────────────────────────────────────────
 
@@ -495,11 +709,257 @@ class TestCache:
         result = get_cached(key)
         assert result is not None
 
+    def test_purge_expired_prunes_stale_stamps(self, temp_db):
+        from engine.cache import (
+            get_file_stamps, set_file_stamps, touch_file_stamps)
+        set_file_stamps([("/old/a.ts", 1, 2, 3, "h"),
+                         ("/new/a.ts", 1, 2, 3, "h")])
+        conn = get_conn()
+        with conn:
+            conn.execute("UPDATE file_stamps SET checked_at = 0")
+        touch_file_stamps(["/new/a.ts"])
+        purge_expired()
+        assert set(get_file_stamps(["/old/a.ts", "/new/a.ts"])) == {
+            "/new/a.ts"}
+
+    def test_init_db_migrates_stamp_checked_at(self, temp_db):
+        from engine.cache import get_file_stamps
+        conn = get_conn()
+        with conn:
+            conn.execute("DROP TABLE file_stamps")
+            conn.execute(
+                "CREATE TABLE file_stamps (path TEXT PRIMARY KEY, "
+                "mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+                "ino INTEGER NOT NULL, content_hash TEXT NOT NULL)")
+            conn.execute(
+                "INSERT INTO file_stamps VALUES ('/a.ts', 1, 2, 3, 'h')")
+        init_db()
+        purge_expired()
+        assert get_file_stamps(["/a.ts"]) == {"/a.ts": ((1, 2, 3), "h")}
+
     def test_cache_key_varies_by_span(self, temp_db):
         k1 = make_unit_cache_key("same_hash", (1, 10))
         k2 = make_unit_cache_key("same_hash", (11, 20))
         assert k1 != k2
 
+    def test_set_and_get_many(self, temp_db):
+        k1 = make_unit_cache_key("many", (1, 2))
+        k2 = make_unit_cache_key("many", (3, 4))
+        set_cached_many([(k1, {"v": 1}), (k2, {"v": 2})])
+        result = get_cached_many([k1, k2, "missing"])
+        assert result == {k1: {"v": 1}, k2: {"v": 2}}
+
+    def test_get_many_empty(self, temp_db):
+        assert get_cached_many([]) == {}
+
+    def test_stored_compressed(self, temp_db):
+        key = make_unit_cache_key("blob", (1, 1))
+        set_cached(key, {"v": "x" * 1000})
+        row = get_conn().execute(
+            "SELECT data FROM cache WHERE cache_key = ?", (key,)).fetchone()
+        assert isinstance(row["data"], bytes)
+        assert len(row["data"]) < 1000
+
+    def test_legacy_text_row_readable(self, temp_db):
+        conn = get_conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO cache (cache_key, data, expires_at) "
+                "VALUES (?, ?, ?)",
+                ("legacy", '{"v": 1}', 2 ** 40))
+        assert get_cached("legacy") == {"v": 1}
+
+    def test_init_db_migrates_expires_at(self, temp_db):
+        conn = get_conn()
+        with conn:
+            conn.execute("DROP TABLE cache")
+            conn.execute(
+                "CREATE TABLE cache (cache_key TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "created_at TEXT NOT NULL DEFAULT (datetime('now')), "
+                "ttl_days INTEGER NOT NULL DEFAULT 7)")
+            conn.execute(
+                "INSERT INTO cache (cache_key, data) VALUES ('old', '{}')")
+            conn.execute(
+                "INSERT INTO cache (cache_key, data, created_at) "
+                "VALUES ('stale', '{}', '2000-01-01 00:00:00')")
+        init_db()
+        assert get_cached("old") == {}
+        purge_expired()
+        keys = {r[0] for r in conn.execute("SELECT cache_key FROM cache")}
+        assert keys == {"old"}
+
+    def test_scan_transaction_rolls_back(self, temp_db):
+        key = make_unit_cache_key("tx", (1, 1))
+        with pytest.raises(RuntimeError):
+            with db_module.scan_transaction() as conn:
+                set_cached_many([(key, {"v": 1})], conn=conn)
+                raise RuntimeError
+        assert get_cached(key) is None
+        with db_module.scan_transaction() as conn:
+            set_cached_many([(key, {"v": 2})], conn=conn)
+        assert get_cached(key) == {"v": 2}
+
+    def test_conn_pooled_per_thread(self, temp_db):
+        import threading
+        assert get_conn() is get_conn()
+        other = []
+        t = threading.Thread(target=lambda: other.append(get_conn()))
+        t.start()
+        t.join()
+        assert other[0] is not get_conn()
+
+    def test_conn_closed_when_thread_exits(self, temp_db):
+        import gc
+        import sqlite3
+        import threading
+        other = []
+        t = threading.Thread(target=lambda: other.append(get_conn()))
+        t.start()
+        t.join()
+        del t
+        gc.collect()
+        with pytest.raises(sqlite3.ProgrammingError):
+            other[0].execute("SELECT 1")
+        assert len(db_module._OPEN) == 1
+
+    def test_close_all_reopens(self, temp_db):
+        conn = get_conn()
+        db_module.close_all()
+        fresh = get_conn()
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone()[0] == 1
+
+
+# ── Pipeline Tests ────────────────────────────────────────
+
+class TestPipeline:
+    def test_file_hash_large_matches_small_path(self, tmp_path):
+        import xxhash
+        from engine.pipeline import _file_content_hash
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        (tmp_path / "big.js").write_bytes(data)
+        (tmp_path / "small.js").write_bytes(data[:100])
+        assert (_file_content_hash(str(tmp_path), "big.js")
+                == xxhash.xxh3_64(data).hexdigest())
+        assert (_file_content_hash(str(tmp_path), "small.js")
+                == xxhash.xxh3_64(data[:100]).hexdigest())
+
+    def test_file_hashes_reuse_stamp(self, tmp_path, temp_db, monkeypatch):
+        from engine import pipeline
+        f = tmp_path / "a.ts"
+        f.write_text("const a = 1;")
+        os.utime(f, (1_000_000_000, 1_000_000_000))
+        first = pipeline._file_hashes(str(tmp_path), ["a.ts"])
+        assert first["a.ts"]
+
+        def fail(*args):
+            raise AssertionError("file should not be re-hashed")
+        monkeypatch.setattr(pipeline, "_file_content_hash", fail)
+        assert pipeline._file_hashes(str(tmp_path), ["a.ts"]) == first
+
+    def test_file_hashes_detects_change(self, tmp_path, temp_db):
+        from engine import pipeline
+        f = tmp_path / "a.ts"
+        f.write_text("const a = 1;")
+        os.utime(f, (1_000_000_000, 1_000_000_000))
+        first = pipeline._file_hashes(str(tmp_path), ["a.ts"])
+        f.write_text("const b = 22;")
+        assert pipeline._file_hashes(str(tmp_path), ["a.ts"]) != first
+
+    def test_file_hash_missing(self, tmp_path):
+        from engine.pipeline import _file_content_hash
+        assert _file_content_hash(str(tmp_path), "nope.ts") == ""
+
+    def test_cache_roundtrip(self, sample_repo, temp_db):
+        from engine import pipeline
+        units = parse_file("src/App.tsx", sample_repo)
+        ev = {u.id: Evidence(u.id, 2, True, 1, 3, ["fix"], 40)
+              for u in units}
+        sc = {u.id: UnitScores(u.id, 55.0, 40.0, False, 12.5, "C-1")
+              for u in units}
+        rules = load_rules(RULES_PATH)
+        rm = {u.id: match_rules(u, rules) for u in units}
+        _, _, _, hits, misses, keys = pipeline._cached_scan(
+            sample_repo, units, rules)
+        assert not hits and len(misses) == len(units)
+
+        pipeline._store_cache(misses, ev, sc, rm, keys)
+        cached_ev, cached_sc, cached_rm, hits, misses, _ = (
+            pipeline._cached_scan(sample_repo, units, rules))
+        assert not misses
+        assert cached_ev == ev and cached_sc == sc and cached_rm == rm
+        assert any(cached_rm.values())
+
+    def test_cached_extract_reuses_units(self, sample_repo, temp_db,
+                                         monkeypatch):
+        from engine import pipeline
+        files = ["src/App.tsx", "src/utils.ts"]
+        first, hashes = pipeline._cached_extract(sample_repo, files)
+        assert first and set(hashes) == set(files)
+
+        def fail(*args):
+            raise AssertionError("unchanged files should not be re-parsed")
+        monkeypatch.setattr(pipeline, "extract_all", fail)
+        again, _ = pipeline._cached_extract(sample_repo, files)
+        assert [vars(u) for u in again] == [vars(u) for u in first]
+
+    def test_cached_extract_keys_on_extension(self, tmp_path, temp_db):
+        from engine import pipeline
+        # <T>x: TS에선 type assertion, TSX에선 JSX
+        src = "export function cast(x) {\n  return <T>x;\n}\n"
+        (tmp_path / "a.ts").write_text(src)
+        (tmp_path / "a.tsx").write_text(src)
+        _, hashes = pipeline._cached_extract(str(tmp_path), ["a.ts"])
+        tsx, tsx_hashes = pipeline._cached_extract(str(tmp_path), ["a.tsx"])
+        assert tsx_hashes["a.tsx"] == hashes["a.ts"]
+        assert ([vars(u) for u in tsx]
+                == [vars(u) for u in parse_file("a.tsx", str(tmp_path))])
+        assert (pipeline._extract_cache_key("a.ts", hashes["a.ts"])
+                != pipeline._extract_cache_key("a.tsx", hashes["a.ts"]))
+
+    def test_cache_key_tracks_rules(self, sample_repo, temp_db):
+        from engine import pipeline
+        units = parse_file("src/App.tsx", sample_repo)
+        rules = load_rules(RULES_PATH)
+        _, _, _, _, misses, keys = pipeline._cached_scan(
+            sample_repo, units, rules)
+        pipeline._store_cache(
+            misses, {u.id: Evidence(u.id) for u in units},
+            {u.id: UnitScores(u.id) for u in units}, {}, keys)
+
+        edited = [Rule(r.id, r.name, r.when, r.severity, r.action + "!")
+                  for r in rules]
+        _, _, _, hits, _, _ = pipeline._cached_scan(
+            sample_repo, units, edited)
+        assert hits == []
+
+    def test_pr_changed_files_local_diff(self, tmp_path, monkeypatch):
+        from engine import pipeline
+
+        def git(*args):
+            subprocess.run(["git", *args], cwd=tmp_path, check=True,
+                           capture_output=True)
+
+        git("init", "-q", "-b", "main")
+        (tmp_path / "a.ts").write_text("const a = 1;")
+        git("add", "-A")
+        git("-c", "user.name=t", "-c", "user.email=t@t",
+            "commit", "-qm", "base")
+        git("update-ref", "refs/remotes/origin/main", "HEAD")
+        git("checkout", "-qb", "feature")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "b b.tsx").write_text("const b = 2;")
+        git("add", "-A")
+        git("-c", "user.name=t", "-c", "user.email=t@t",
+            "commit", "-qm", "feature")
+
+        def no_gh(*args, **kwargs):
+            raise AssertionError("gh should not be called")
+        monkeypatch.setattr(pipeline, "_get_pr_base_ref", no_gh)
+        assert pipeline._get_pr_changed_files(
+            str(tmp_path), 1, base_ref="main") == ["src/b b.tsx"]
+
 
 # ── Report Tests ──────────────────────────────────────────
 
@@ -550,3 +1010,53 @@ class TestReport:
         comment = render_pr_comment(report)
         assert "GhostCode Audit Report" in comment
         assert "Top Hotspots" in comment
+
+    def test_cluster_members_resolved(self):
+        from engine.report import build_report
+        from engine.similarity import Cluster
+
+        units = [
+            Unit(id="u1", file_path="a.ts", name="fa", kind="function",
+                 span=(1, 3), loc=3),
+            Unit(id="u2", file_path="b.ts", name="fb", kind="function",
+                 span=(1, 3), loc=3),
+        ]
+        scores = {u.id: UnitScores(unit_id=u.id) for u in units}
+        clusters = [Cluster(id="C-1", members=["u1", "u2", "gone"],
+                            suggestion="merge")]
+
+        report = build_report("test", "sha", "main", "full", units, {},
+                              scores, clusters, {})
+        assert report["clusters"][0]["members"] == ["a.ts#fa", "b.ts#fb", "?#?"]
+
+    def test_save_json_roundtrip(self, tmp_path):
+        import json
+        from engine.report import save_json
+
+        report = {"summary": {"total_units": 2}, "why": ["깊은 중첩"]}
+        out = tmp_path / "out" / "report.json"
+        save_json(report, out)
+        text = out.read_text(encoding="utf-8")
+        assert json.loads(text) == report
+        assert "깊은 중첩" in text and "\n  " in text
+
+    def test_hotspots_ranked_shadow_first(self):
+        from engine.report import build_report
+
+        units = [
+            Unit(id=f"u{i}", file_path="a.ts", name=f"f{i}",
+                 kind="function", span=(i, i), loc=1)
+            for i in range(15)
+        ]
+        scores = {
+            u.id: UnitScores(unit_id=u.id, cognitive_load=float(i % 5),
+                             shadow=(i == 14))
+            for i, u in enumerate(units)
+        }
+        report = build_report("test", "sha", "main", "full", units, {},
+                              scores, [], {})
+        symbols = [h["symbol"] for h in report["hotspots"]]
+        expected = sorted(units, key=lambda u: (
+            -int(scores[u.id].shadow), -scores[u.id].cognitive_load))[:10]
+        assert symbols == [u.name for u in expected]
+        assert symbols[0] == "f14"